@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+from bisect import bisect_left, bisect_right
+from collections import deque
+import logging
+import math
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from utils.metrics import metrics
+
+CURRENT_METRICS = ('temperature', 'humidity', 'wind_speed', 'weather_code')
+FORECAST_METRICS = ('temp_max', 'temp_min', 'precipitation_prob', 'wind_speed')
+OPERATORS = ('>', '>=', '<', '<=')
+
+RULE_PATTERN = re.compile(
+    r'^\s*(?:(?P<city>[^:]+?)\s*:\s*)?'
+    r'(?:(?P<forecast>forecast)\.)?(?P<metric>\w+)(?:\[(?P<day>\d+)\])?'
+    r'(?:\s+change\s+(?P<window>\d+(?:\.\d+)?)h)?'
+    r'\s*(?P<op>>=|<=|>|<)\s*(?P<threshold>-?\d+(?:\.\d+)?)\s*$'
+)
+
+class Rule(NamedTuple):
+    id: str
+    metric: str
+    op: str
+    threshold: float
+    city: Optional[str] = None
+    source: str = 'current'
+    day: int = 0
+    window: float = 0
+
+    @property
+    def field(self) -> Tuple:
+        if self.source == 'forecast':
+            return ('forecast', self.metric, self.day)
+        if self.source == 'change':
+            return ('change', self.metric, self.window)
+        return ('current', self.metric)
+
+class Alert(NamedTuple):
+    rule: Rule
+    city: str
+    value: float
+    date: Optional[str]
+    raised_at: float
+
+    @property
+    def message(self) -> str:
+        rule = self.rule
+        if rule.source == 'forecast':
+            subject = f"{rule.metric} on {self.date}"
+        elif rule.source == 'change':
+            subject = f"{rule.metric} change over {rule.window / 3600:g}h"
+        else:
+            subject = rule.metric
+        return f"{self.city}: {subject} is {self.value:g} ({rule.op} {rule.threshold:g})"
+
+    def to_dict(self) -> Dict:
+        return {'alert': self.rule.id, 'city': self.city, 'value': self.value, 'date': self.date,
+                'message': self.message, 'raised_at': self.raised_at}
+
+def parse_rule(spec: Union[str, Dict]) -> Rule:
+    if isinstance(spec, dict):
+        source = spec.get('source', 'current')
+        rule = Rule(
+            id=spec.get('id') or f"{spec.get('city') or '*'}:{source}.{spec['metric']}{spec['op']}{spec['threshold']}",
+            metric=spec['metric'],
+            op=spec['op'],
+            threshold=float(spec['threshold']),
+            city=spec.get('city'),
+            source=source,
+            day=int(spec.get('day', 0)),
+            window=float(spec.get('window_hours', 0)) * 3600
+        )
+    else:
+        match = RULE_PATTERN.match(spec)
+        if not match:
+            raise ValueError(f"Cannot parse alert rule: {spec!r}")
+        if match['forecast'] and match['window']:
+            raise ValueError(f"Forecast rules cannot use 'change': {spec!r}")
+        source = 'forecast' if match['forecast'] else 'change' if match['window'] else 'current'
+        rule = Rule(
+            id=' '.join(spec.split()),
+            metric=match['metric'],
+            op=match['op'],
+            threshold=float(match['threshold']),
+            city=match['city'],
+            source=source,
+            day=int(match['day'] or 0),
+            window=float(match['window'] or 0) * 3600
+        )
+
+    if rule.op not in OPERATORS:
+        raise ValueError(f"Unknown operator {rule.op!r} in rule {rule.id!r}")
+    if rule.source == 'forecast':
+        if rule.metric not in FORECAST_METRICS:
+            raise ValueError(f"Unknown forecast metric {rule.metric!r} in rule {rule.id!r}")
+    elif rule.metric not in CURRENT_METRICS:
+        raise ValueError(f"Unknown metric {rule.metric!r} in rule {rule.id!r}")
+    if rule.source == 'change' and rule.window <= 0:
+        raise ValueError(f"Change rules need a window in rule {rule.id!r}")
+    return rule
+
+class _ThresholdIndex:
+    # Rules sharing one field, split by operator and sorted by threshold. The rules that hold for a
+    # value are then a prefix (> and >=) or a suffix (< and <=) of each list, so a change from one
+    # value to another flips exactly the rules whose thresholds lie between the two.
+    __slots__ = ('thresholds', 'rules')
+
+    def __init__(self):
+        self.thresholds = {op: [] for op in OPERATORS}
+        self.rules = {op: [] for op in OPERATORS}
+
+    def add(self, rule: Rule):
+        thresholds, rules = self.thresholds[rule.op], self.rules[rule.op]
+        position = bisect_right(thresholds, rule.threshold)
+        thresholds.insert(position, rule.threshold)
+        rules.insert(position, rule)
+
+    def boundary(self, op: str, value: Optional[float]) -> int:
+        thresholds = self.thresholds[op]
+        if value is None:
+            return 0 if op in ('>', '>=') else len(thresholds)
+        if op in ('>', '<='):
+            return bisect_left(thresholds, value)
+        return bisect_right(thresholds, value)
+
+    def flips(self, old: Optional[float], new: Optional[float]) -> Tuple[List[Rule], List[Rule]]:
+        raised, cleared = [], []
+        for op in OPERATORS:
+            rules = self.rules[op]
+            if not rules:
+                continue
+            old_boundary, new_boundary = self.boundary(op, old), self.boundary(op, new)
+            if op in ('>', '>='):
+                raised.extend(rules[old_boundary:new_boundary])
+                cleared.extend(rules[new_boundary:old_boundary])
+            else:
+                raised.extend(rules[new_boundary:old_boundary])
+                cleared.extend(rules[old_boundary:new_boundary])
+        return raised, cleared
+
+class AlertEngine:
+    def __init__(self, rules: Iterable[Union[str, Dict, Rule]] = (), history_store=None):
+        self.logger = logging.getLogger(__name__)
+        self.history_store = history_store
+        self.rules: Dict[str, Rule] = {}
+        self.active: Dict[Tuple[str, str], Alert] = {}
+        self._index: Dict[Tuple[Optional[str], Tuple], _ThresholdIndex] = {}
+        self._fields: Dict[Optional[str], set] = {}
+        self._state: Dict[Tuple[str, Tuple], Tuple[Optional[float], Optional[str]]] = {}
+        self._samples: Dict[Tuple[str, str], deque] = {}
+        self._samples_lock = threading.Lock()
+        self._max_window: Dict[str, float] = {}
+        for rule in rules:
+            try:
+                self.add_rule(rule)
+            except (KeyError, ValueError) as e:
+                self.logger.error(f"Skipping alert rule {rule!r}: {str(e)}")
+
+    def add_rule(self, rule: Union[str, Dict, Rule]) -> Rule:
+        if not isinstance(rule, Rule):
+            rule = parse_rule(rule)
+        if rule.id in self.rules:
+            raise ValueError(f"Duplicate alert rule {rule.id!r}")
+        self.rules[rule.id] = rule
+        field = rule.field
+        self._index.setdefault((rule.city, field), _ThresholdIndex()).add(rule)
+        self._fields.setdefault(rule.city, set()).add(field)
+        if rule.source == 'change':
+            self._max_window[rule.metric] = max(self._max_window.get(rule.metric, 0), rule.window)
+        return rule
+
+    def _change(self, city: str, metric: str, value: Optional[float], window: float, now: float) -> Optional[float]:
+        samples = self._samples.get((city, metric))
+        if not samples or value is None:
+            return None
+        cutoff = now - window
+        for ts, reference in samples:
+            if ts >= cutoff:
+                return value - reference
+        return None
+
+    def _load_samples(self, city: str, names: Iterable[str], now: float) -> Dict[str, deque]:
+        names = list(names)
+        rows = self.history_store.query(city, now - max(self._max_window[metric] for metric in names), now)
+        loaded = {}
+        for metric in names:
+            cutoff = now - self._max_window[metric]
+            loaded[metric] = deque((row['ts'], row[metric]) for row in rows
+                                   if row['ts'] >= cutoff and row.get(metric) is not None)
+        return loaded
+
+    def warm(self, cities: Iterable[str], now: Optional[float] = None):
+        # Loads the history change rules compare against ahead of update(), so callers can keep the
+        # store queries off threads that must not block
+        if self.history_store is None or not self._max_window:
+            return
+        now = time.time() if now is None else now
+        for city in cities:
+            with self._samples_lock:
+                missing = [metric for metric in self._max_window if (city, metric) not in self._samples]
+            if not missing:
+                continue
+            loaded = self._load_samples(city, missing, now)
+            with self._samples_lock:
+                for metric, samples in loaded.items():
+                    self._samples.setdefault((city, metric), samples)
+
+    def _record_sample(self, city: str, metric: str, value: Optional[float], now: float):
+        key = (city, metric)
+        samples = self._samples.get(key)
+        if samples is None:
+            if self.history_store is not None:
+                samples = self._load_samples(city, [metric], now)[metric]
+            else:
+                samples = deque()
+            with self._samples_lock:
+                samples = self._samples.setdefault(key, samples)
+        if value is not None and (not samples or samples[-1][0] < now):
+            samples.append((now, value))
+        cutoff = now - self._max_window[metric]
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+
+    @staticmethod
+    def _number(value) -> Optional[float]:
+        if value is None or isinstance(value, bool):
+            return None
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        return None if math.isnan(value) else value
+
+    def update(self, city: str, current: Optional[Dict], forecast: Optional[List[Dict]] = None,
+               now: Optional[float] = None) -> Tuple[List[Alert], List[Alert]]:
+        now = time.time() if now is None else now
+        fields = self._fields.get(None, set()) | self._fields.get(city, set())
+        if not fields:
+            return [], []
+
+        with metrics.timer('alert_engine_update_seconds'):
+            values = {}
+            for field in fields:
+                source, metric = field[0], field[1]
+                if source == 'forecast':
+                    day = field[2]
+                    if forecast is None:
+                        continue
+                    entry = forecast[day] if day < len(forecast) else {}
+                    values[field] = (self._number(entry.get(metric)), entry.get('date'))
+                elif current is not None:
+                    value = self._number(current.get(metric))
+                    if source == 'change':
+                        values[field] = (self._change(city, metric, value, field[2], now), None)
+                    else:
+                        values[field] = (value, None)
+
+            if current is not None:
+                for metric in self._max_window:
+                    self._record_sample(city, metric, self._number(current.get(metric)), now)
+
+            raised, cleared = [], []
+            for field, (value, date) in values.items():
+                old_value, old_date = self._state.get((city, field), (None, None))
+                if (old_value, old_date) == (value, date):
+                    continue
+                self._state[(city, field)] = (value, date)
+                if old_date != date:
+                    # A new forecast day is a new event, so alerts for the previous date are cleared
+                    old_value = None
+                    for rule in self._rules_for(city, field):
+                        alert = self.active.pop((rule.id, city), None)
+                        if alert:
+                            cleared.append(alert)
+
+                for scope in (None, city):
+                    index = self._index.get((scope, field))
+                    if index is None:
+                        continue
+                    flipped_on, flipped_off = index.flips(old_value, value)
+                    for rule in flipped_off:
+                        alert = self.active.pop((rule.id, city), None)
+                        if alert:
+                            cleared.append(alert)
+                    for rule in flipped_on:
+                        alert = Alert(rule, city, value, date, now)
+                        self.active[(rule.id, city)] = alert
+                        raised.append(alert)
+
+        if raised:
+            metrics.inc('alerts_raised_total', len(raised))
+        return raised, cleared
+
+    def _rules_for(self, city: str, field: Tuple) -> List[Rule]:
+        rules = []
+        for scope in (None, city):
+            index = self._index.get((scope, field))
+            if index is not None:
+                for op_rules in index.rules.values():
+                    rules.extend(op_rules)
+        return rules
+
+    def remove_city(self, city: str) -> List[Alert]:
+        cleared = [alert for key, alert in self.active.items() if key[1] == city]
+        for alert in cleared:
+            del self.active[(alert.rule.id, city)]
+        for key in [key for key in self._state if key[0] == city]:
+            del self._state[key]
+        with self._samples_lock:
+            for key in [key for key in self._samples if key[0] == city]:
+                del self._samples[key]
+        return cleared
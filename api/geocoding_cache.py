@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+CACHE_MISS = object()
+DEFAULT_MAX_ENTRIES = 5000
+
+def cache_size_for(city_count: int) -> int:
+    # A poll loop visits every city in order, so an LRU smaller than the city list misses on every lookup
+    return max(DEFAULT_MAX_ENTRIES, 2 * city_count)
+
+class GeocodingCache:
+    def __init__(self, cache_file: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES, negative_ttl: float = 300,
+                 flush_delay: float = 2.0):
+        self.logger = logging.getLogger(__name__)
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.flush_delay = flush_delay
+        self._entries = OrderedDict()
+        self._negative = {}
+        # Coordinates chosen by the user, such as an autocomplete pick; never evicted
+        self._pinned = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_timer = None
+        self._dirty = False
+        self._load()
+
+    @staticmethod
+    def normalize(city: str) -> str:
+        return ' '.join(city.split()).casefold()
+
+    def get(self, city: str):
+        key = self.normalize(city)
+        with self._lock:
+            if key in self._pinned:
+                return self._pinned[key]
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+            expires_at = self._negative.get(key)
+            if expires_at is not None:
+                if expires_at > time.time():
+                    return None
+                del self._negative[key]
+
+        return CACHE_MISS
+
+    def put(self, city: str, coords: Optional[Tuple[float, float]]):
+        key = self.normalize(city)
+        with self._lock:
+            if coords is None:
+                self._negative[key] = time.time() + self.negative_ttl
+                return
+
+            self._negative.pop(key, None)
+            self._entries[key] = (coords[0], coords[1])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._mark_dirty()
+
+    def pin(self, city: str, coords: Tuple[float, float]):
+        key = self.normalize(city)
+        with self._lock:
+            self._pinned[key] = (coords[0], coords[1])
+            self._negative.pop(key, None)
+            self._mark_dirty()
+
+    def unpin(self, city: str):
+        key = self.normalize(city)
+        with self._lock:
+            if self._pinned.pop(key, None) is not None:
+                self._mark_dirty()
+
+    def _load(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            for key, coords in data.items():
+                if len(coords) > 2 and coords[2]:
+                    self._pinned[key] = (coords[0], coords[1])
+                else:
+                    self._entries[key] = (coords[0], coords[1])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        except Exception as e:
+            self.logger.error(f"Error loading geocoding cache: {str(e)}")
+
+    def _mark_dirty(self):
+        if not self.cache_file:
+            return
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                data = dict(self._entries)
+                data.update((key, [lat, lon, True]) for key, (lat, lon) in self._pinned.items())
+            self._save(data)
+
+    def _save(self, data: Dict):
+        try:
+            directory = os.path.dirname(os.path.abspath(self.cache_file))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.cache_file)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            self.logger.error(f"Error saving geocoding cache: {str(e)}")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+from array import array
+from bisect import bisect_left
+import math
+from typing import Dict, List
+from api.weather_codes import WEATHER_CODES
+
+HOURLY_PARAMS = ['temperature_2m', 'precipitation_probability', 'precipitation', 'wind_speed_10m', 'weather_code']
+
+MISSING_FLOAT = float('nan')
+MISSING_PERCENT = -1
+MISSING_CODE = 255
+
+def _column(typecode: str, values: List, missing) -> array:
+    if None in values:
+        values = [missing if value is None else value for value in values]
+    return array(typecode, values)
+
+def _float_list(values: array) -> List:
+    return [None if math.isnan(value) else round(value, 1) for value in values]
+
+class HourlyForecast:
+    __slots__ = ('time', 'temperature', 'precipitation_probability', 'precipitation', 'wind_speed',
+                 'weather_code', 'utc_offset')
+
+    def __init__(self, time: array, temperature: array, precipitation_probability: array,
+                 precipitation: array, wind_speed: array, weather_code: array, utc_offset: int = 0):
+        self.time = time
+        self.temperature = temperature
+        self.precipitation_probability = precipitation_probability
+        self.precipitation = precipitation
+        self.wind_speed = wind_speed
+        self.weather_code = weather_code
+        self.utc_offset = utc_offset
+
+    @classmethod
+    def from_response(cls, data: Dict) -> 'HourlyForecast':
+        hourly = data['hourly']
+        return cls(
+            time=array('q', hourly['time']),
+            temperature=_column('f', hourly['temperature_2m'], MISSING_FLOAT),
+            precipitation_probability=_column('b', hourly['precipitation_probability'], MISSING_PERCENT),
+            precipitation=_column('f', hourly['precipitation'], MISSING_FLOAT),
+            wind_speed=_column('f', hourly['wind_speed_10m'], MISSING_FLOAT),
+            weather_code=_column('B', hourly['weather_code'], MISSING_CODE),
+            utc_offset=data.get('utc_offset_seconds', 0)
+        )
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def index_at(self, timestamp: float) -> int:
+        return bisect_left(self.time, timestamp)
+
+    def window(self, start: float, end: float) -> 'HourlyForecast':
+        lo, hi = self.index_at(start), self.index_at(end)
+        return HourlyForecast(
+            self.time[lo:hi], self.temperature[lo:hi], self.precipitation_probability[lo:hi],
+            self.precipitation[lo:hi], self.wind_speed[lo:hi], self.weather_code[lo:hi], self.utc_offset
+        )
+
+    def description(self, index: int) -> str:
+        return WEATHER_CODES.get(self.weather_code[index], "Unknown")
+
+    def to_columns(self) -> Dict[str, List]:
+        return {
+            'time': self.time.tolist(),
+            'temperature': _float_list(self.temperature),
+            'precipitation_probability': [None if value == MISSING_PERCENT else value
+                                          for value in self.precipitation_probability],
+            'precipitation': _float_list(self.precipitation),
+            'wind_speed': _float_list(self.wind_speed),
+            'weather_code': [None if value == MISSING_CODE else value for value in self.weather_code],
+            'utc_offset': self.utc_offset
+        }
+
+    @classmethod
+    def from_columns(cls, columns: Dict) -> 'HourlyForecast':
+        return cls(
+            time=array('q', columns['time']),
+            temperature=_column('f', columns['temperature'], MISSING_FLOAT),
+            precipitation_probability=_column('b', columns['precipitation_probability'], MISSING_PERCENT),
+            precipitation=_column('f', columns['precipitation'], MISSING_FLOAT),
+            wind_speed=_column('f', columns['wind_speed'], MISSING_FLOAT),
+            weather_code=_column('B', columns['weather_code'], MISSING_CODE),
+            utc_offset=columns.get('utc_offset', 0)
+        )
+
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in (
+            self.time, self.temperature, self.precipitation_probability,
+            self.precipitation, self.wind_speed, self.weather_code
+        ))
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+from datetime import date, datetime, timedelta
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+import requests
+
+# An archive is a gzip-compressed JSON Lines file. Forecast responses are split into one entry per
+# location, keyed by the query without its coordinates, so replay can answer batches of any shape.
+ARCHIVE_VERSION = 1
+LOCATION_PARAMS = ('latitude', 'longitude')
+
+def query_key(params: Dict) -> str:
+    return json.dumps(sorted((name, value) for name, value in params.items() if name not in LOCATION_PARAMS))
+
+def _points(params: Dict) -> List[Tuple[float, float]]:
+    latitudes = str(params.get('latitude', '')).split(',')
+    longitudes = str(params.get('longitude', '')).split(',')
+    return [(round(float(lat), 4), round(float(lon), 4)) for lat, lon in zip(latitudes, longitudes)]
+
+def _normalize_name(name: str) -> str:
+    return ' '.join(name.split()).casefold()
+
+class ProviderResponse:
+    __slots__ = ('status_code', 'headers', 'content', 'url')
+
+    def __init__(self, status_code: int, content: bytes, url: str = '', headers: Optional[Dict] = None):
+        self.status_code = status_code
+        self.content = content
+        self.url = url
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+class OpenMeteoProvider:
+    def __init__(self, session: requests.Session):
+        self.session = session
+
+    def get(self, endpoint: str, url: str, params: Dict, timeout):
+        return self.session.get(url, params=params, timeout=timeout)
+
+    def close(self):
+        pass
+
+class RecordingProvider:
+    def __init__(self, provider, archive_file: str):
+        self.logger = logging.getLogger(__name__)
+        self.provider = provider
+        self.archive_file = archive_file
+        self.recorded = 0
+        self._started = time.time()
+        self._lock = threading.Lock()
+        new_file = not os.path.exists(archive_file)
+        self._file = gzip.open(archive_file, 'at', encoding='utf-8')
+        if new_file:
+            self._write({'version': ARCHIVE_VERSION, 'recorded_at': self._started})
+
+    def _write(self, entry: Dict):
+        self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+    def get(self, endpoint: str, url: str, params: Dict, timeout):
+        started = time.monotonic()
+        response = self.provider.get(endpoint, url, params, timeout)
+        latency = time.monotonic() - started
+        if response.status_code != 200:
+            return response
+
+        try:
+            entries = self._entries(endpoint, params, response.json(), latency)
+        except (ValueError, TypeError, KeyError) as e:
+            self.logger.error(f"Not recording {endpoint} response: {str(e)}")
+            return response
+
+        with self._lock:
+            if self._file is None:
+                return response
+            for entry in entries:
+                self._write(entry)
+            self.recorded += len(entries)
+        return response
+
+    @staticmethod
+    def _entries(endpoint: str, params: Dict, body, latency: float) -> List[Dict]:
+        entry = {'endpoint': endpoint, 'day': date.today().isoformat(), 'latency': round(latency, 4)}
+        if endpoint == 'geocoding':
+            return [dict(entry, name=_normalize_name(params['name']), body=body)]
+
+        points = _points(params)
+        locations = body if isinstance(body, list) else [body]
+        if len(locations) != len(points):
+            raise ValueError(f"expected {len(points)} locations, got {len(locations)}")
+        query = query_key(params)
+        return [dict(entry, query=query, point=point, body=location) for point, location in zip(points, locations)]
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self.logger.info(f"Recorded {self.recorded} responses to {self.archive_file}")
+        self.provider.close()
+
+class ReplayProvider:
+    def __init__(self, archive_file: str, speed: Optional[float] = None, synthesize: bool = True,
+                 shift_dates: bool = True):
+        self.logger = logging.getLogger(__name__)
+        self.speed = speed
+        self.synthesize = synthesize
+        self.shift_dates = shift_dates
+        self.served = {'recorded': 0, 'synthesized': 0, 'missing': 0}
+        self._places: Dict[str, Tuple[str, float]] = {}
+        self._locations: Dict[str, Dict[Tuple[float, float], Tuple[str, float]]] = {}
+        self._samples: Dict[str, List[Tuple[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._load(archive_file)
+
+    def _load(self, archive_file: str):
+        today = date.today()
+        with gzip.open(archive_file, 'rt', encoding='utf-8') as f:
+            for line in self._lines(f, archive_file):
+                entry = json.loads(line)
+                endpoint = entry.get('endpoint')
+                if endpoint is None:
+                    continue
+                body = entry['body']
+                if self.shift_dates:
+                    self._shift(body, (today - date.fromisoformat(entry['day'])).days)
+                if endpoint == 'geocoding':
+                    self._places[entry['name']] = (json.dumps(body), entry['latency'])
+                    continue
+
+                # Coordinates are left out of the stored text so a sample can be served for any point
+                body.pop('latitude', None)
+                body.pop('longitude', None)
+                text = json.dumps(body)[1:]
+                text = (',' + text) if len(text) > 1 else text
+                point = tuple(entry['point'])
+                locations = self._locations.setdefault(entry['query'], {})
+                if point not in locations:
+                    self._samples.setdefault(entry['query'], []).append((text, entry['latency']))
+                locations[point] = (text, entry['latency'])
+
+        self.logger.info(f"Loaded {len(self._places)} places and "
+                         f"{sum(len(points) for points in self._locations.values())} locations from {archive_file}")
+
+    def _lines(self, f, archive_file: str):
+        try:
+            yield from f
+        except EOFError:
+            # A recording that was not closed cleanly ends mid-block; keep what was written before that
+            self.logger.warning(f"Archive {archive_file} is truncated, replaying the complete entries only")
+
+    @staticmethod
+    def _shift(body: Dict, days: int):
+        if not days:
+            return
+        current = body.get('current')
+        if current and isinstance(current.get('time'), str):
+            current['time'] = (datetime.fromisoformat(current['time']) + timedelta(days=days)).isoformat(timespec='minutes')
+        daily = body.get('daily')
+        if daily and daily.get('time'):
+            daily['time'] = [(date.fromisoformat(day) + timedelta(days=days)).isoformat() for day in daily['time']]
+        hourly = body.get('hourly')
+        if hourly and hourly.get('time') and isinstance(hourly['time'][0], int):
+            hourly['time'] = [ts + days * 86400 for ts in hourly['time']]
+
+    @staticmethod
+    def _synthetic_place(name: str) -> str:
+        seed = zlib.crc32(_normalize_name(name).encode())
+        return json.dumps({'results': [{
+            'name': name,
+            'latitude': round((seed % 17000) / 100 - 85, 4),
+            'longitude': round((seed // 17000 % 36000) / 100 - 180, 4)
+        }]})
+
+    def get(self, endpoint: str, url: str, params: Dict, timeout):
+        if endpoint == 'geocoding':
+            content, latency, source = self._geocode(params['name'])
+        else:
+            content, latency, source = self._forecast(params)
+        with self._lock:
+            self.served[source] += 1
+
+        if self.speed and latency:
+            time.sleep(latency / self.speed)
+        if content is None:
+            return ProviderResponse(404, b'{"error":true,"reason":"No recorded response"}', url)
+        return ProviderResponse(200, content.encode(), url)
+
+    def _geocode(self, name: str):
+        recorded = self._places.get(_normalize_name(name))
+        if recorded:
+            return recorded[0], recorded[1], 'recorded'
+        if not self.synthesize:
+            return None, 0, 'missing'
+        return self._synthetic_place(name), 0, 'synthesized'
+
+    def _forecast(self, params: Dict):
+        query = query_key(params)
+        locations = self._locations.get(query, {})
+        samples = self._samples.get(query)
+        parts, latency, source = [], 0.0, 'recorded'
+        for lat, lon in _points(params):
+            recorded = locations.get((lat, lon))
+            if recorded is None:
+                if not (self.synthesize and samples):
+                    return None, 0, 'missing'
+                recorded = samples[zlib.crc32(f"{lat},{lon}".encode()) % len(samples)]
+                source = 'synthesized'
+            text, entry_latency = recorded
+            parts.append(f'{{"latitude":{lat},"longitude":{lon}{text}')
+            latency = max(latency, entry_latency)
+        content = parts[0] if len(parts) == 1 else '[' + ','.join(parts) + ']'
+        return content, latency, source
+
+    def city_names(self, count: int) -> List[str]:
+        names = [name.title() for name in self._places][:count]
+        names.extend(f"Replay City {i}" for i in range(len(names), count))
+        return names
+
+    def close(self):
+        self.logger.info(f"Replay served {self.served['recorded']} recorded, {self.served['synthesized']} "
+                         f"synthesized and {self.served['missing']} missing responses")
+
+def create_provider(session: requests.Session, record_file: Optional[str] = None,
+                    replay_file: Optional[str] = None, replay_speed: Optional[float] = None):
+    if replay_file:
+        return ReplayProvider(replay_file, speed=replay_speed)
+    provider = OpenMeteoProvider(session)
+    if record_file:
+        provider = RecordingProvider(provider, record_file)
+    return provider
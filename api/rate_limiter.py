@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+import requests
+from utils.metrics import metrics
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# Open-Meteo's free tier: 600 calls per minute, 5,000 per hour, 10,000 per day
+DEFAULT_RATE_LIMITS = ((600, 60), (5000, 3600), (10000, 86400))
+
+# Longest a caller may wait for tokens. Background work is rejected quickly so it does not hold a
+# worker thread that an interactive request needs; the scheduler retries it later.
+DEFAULT_MAX_WAIT = {PRIORITY_INTERACTIVE: 30.0, PRIORITY_BACKGROUND: 5.0}
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    pass
+
+class RateLimiterClosed(requests.exceptions.RequestException):
+    pass
+
+_local = threading.local()
+
+@contextmanager
+def request_priority(priority: int):
+    previous = getattr(_local, 'priority', PRIORITY_BACKGROUND)
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+def current_priority() -> int:
+    return getattr(_local, 'priority', PRIORITY_BACKGROUND)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+
+    def __init__(self, capacity: float, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, cost: float) -> float:
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+class RateLimiter:
+    def __init__(self, limits: Iterable[Tuple[float, float]] = DEFAULT_RATE_LIMITS,
+                 max_wait: Optional[Dict[int, float]] = None):
+        self.buckets = [TokenBucket(count, period) for count, period in limits]
+        self.max_wait = DEFAULT_MAX_WAIT if max_wait is None else max_wait
+        self.blocked_until = 0.0
+        self.closed = False
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, cost: float = 1, priority: Optional[int] = None):
+        priority = current_priority() if priority is None else priority
+        if self.buckets:
+            cost = min(cost, min(bucket.capacity for bucket in self.buckets))
+        entry = (priority, next(self._sequence))
+        started = time.monotonic()
+        max_wait = self.max_wait.get(priority)
+        deadline = None if max_wait is None else started + max_wait
+
+        with self._condition:
+            if self.closed:
+                raise RateLimiterClosed("Rate limiter is closed")
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    for bucket in self.buckets:
+                        bucket.refill(now)
+                    remaining = None if deadline is None else deadline - now
+                    if self._queue[0] is entry:
+                        wait = max([self.blocked_until - now] + [bucket.time_until(cost) for bucket in self.buckets])
+                        if wait <= 0:
+                            for bucket in self.buckets:
+                                bucket.tokens -= cost
+                            return
+                        if remaining is not None and wait > remaining:
+                            metrics.inc('rate_limiter_rejected_total', priority=str(priority))
+                            raise RateLimitExceeded(f"Rate limit reached, next slot in {wait:.0f}s")
+                    else:
+                        wait = remaining
+                        if wait is not None and wait <= 0:
+                            metrics.inc('rate_limiter_rejected_total', priority=str(priority))
+                            raise RateLimitExceeded("Timed out waiting for the rate limiter")
+                    self._condition.wait(wait)
+                    if self.closed:
+                        raise RateLimiterClosed("Rate limiter is closed")
+            finally:
+                if self._queue[0] is entry:
+                    heapq.heappop(self._queue)
+                else:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                self._condition.notify_all()
+                metrics.observe('rate_limiter_wait_seconds', time.monotonic() - started, priority=str(priority))
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def penalize(self, delay: float):
+        with self._condition:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self._condition.notify_all()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+from array import array
+from collections.abc import Mapping, Sequence
+from datetime import date
+from typing import Dict, List, Optional, Union
+from api.weather_codes import WEATHER_CODES
+
+MISSING = -32768
+
+def _description(code: Optional[int]) -> str:
+    return WEATHER_CODES.get(code, "Unknown")
+
+def _small(value) -> int:
+    return MISSING if value is None else round(value)
+
+def _value(value: int) -> Optional[int]:
+    return None if value == MISSING else value
+
+class CurrentWeather(Mapping):
+    __slots__ = ('temperature', 'humidity', 'wind_speed', 'weather_code', 'city_name')
+    KEYS = ('temperature', 'humidity', 'wind_speed', 'description', 'weather_code', 'city_name')
+
+    def __init__(self, temperature, humidity, wind_speed, weather_code, city_name):
+        self.temperature = temperature
+        self.humidity = humidity
+        self.wind_speed = wind_speed
+        self.weather_code = weather_code
+        self.city_name = city_name
+
+    @property
+    def description(self) -> str:
+        return _description(self.weather_code)
+
+    def __getitem__(self, key: str):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __repr__(self) -> str:
+        return f"CurrentWeather({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict:
+        return {key: getattr(self, key) for key in self.KEYS}
+
+    def to_json(self) -> List:
+        return [self.temperature, self.humidity, self.wind_speed, self.weather_code, self.city_name]
+
+    @classmethod
+    def from_json(cls, data: Union[List, Dict]) -> 'CurrentWeather':
+        if isinstance(data, list):
+            return cls(*data)
+        return cls(data.get('temperature'), data.get('humidity'), data.get('wind_speed'),
+                   data.get('weather_code'), data.get('city_name'))
+
+class ForecastDay(Mapping):
+    __slots__ = ('forecast', 'index')
+    KEYS = ('date', 'temp_max', 'temp_min', 'precipitation_prob', 'wind_speed', 'description')
+
+    def __init__(self, forecast: 'DailyForecast', index: int):
+        self.forecast = forecast
+        self.index = index
+
+    def __getitem__(self, key: str):
+        forecast, i = self.forecast, self.index
+        if key == 'date':
+            return date.fromordinal(forecast.start + i).isoformat()
+        if key == 'description':
+            return _description(forecast.value('weather_code', i))
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return forecast.value(key, i)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __repr__(self) -> str:
+        return f"ForecastDay({dict(self)!r})"
+
+class DailyForecast(Sequence):
+    # Days are consecutive, so only the first date is kept. The columns share one int16 array,
+    # laid out column by column, with MISSING standing in for nulls.
+    __slots__ = ('start', 'days', 'values')
+    COLUMNS = ('temp_max', 'temp_min', 'precipitation_prob', 'wind_speed', 'weather_code')
+
+    def __init__(self, start: int, days: int, values: array):
+        self.start = start
+        self.days = days
+        self.values = values
+
+    @classmethod
+    def from_columns(cls, dates: List[str], temp_max: List, temp_min: List, precipitation_prob: List,
+                     wind_speed: List, weather_code: List) -> 'DailyForecast':
+        ordinals = [date.fromisoformat(day).toordinal() for day in dates]
+        if ordinals and ordinals != list(range(ordinals[0], ordinals[0] + len(ordinals))):
+            raise ValueError("Forecast dates are not consecutive")
+        values = array('h')
+        for column in (temp_max, temp_min, precipitation_prob, wind_speed, weather_code):
+            values.extend(map(_small, column))
+        return cls(ordinals[0] if ordinals else 0, len(ordinals), values)
+
+    def value(self, column: str, index: int) -> Optional[int]:
+        return _value(self.values[self.COLUMNS.index(column) * self.days + index])
+
+    def column(self, column: str) -> List[Optional[int]]:
+        offset = self.COLUMNS.index(column) * self.days
+        return [_value(value) for value in self.values[offset:offset + self.days]]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.days))]
+        if index < 0:
+            index += self.days
+        if not 0 <= index < self.days:
+            raise IndexError(index)
+        return ForecastDay(self, index)
+
+    def __len__(self) -> int:
+        return self.days
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, DailyForecast):
+            return self.start == other.start and self.days == other.days and self.values == other.values
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"DailyForecast({self.to_list()!r})"
+
+    def to_list(self) -> List[Dict]:
+        return [dict(day) for day in self]
+
+    def to_json(self) -> List:
+        return [date.fromordinal(self.start).isoformat() if self.days else None, self.values.tolist()]
+
+    @classmethod
+    def from_json(cls, data: List) -> 'DailyForecast':
+        if data and isinstance(data[0], dict):
+            # Older snapshots stored one dict per day, with a description instead of a weather code
+            codes = {description: code for code, description in WEATHER_CODES.items()}
+            return cls.from_columns(
+                [day['date'] for day in data],
+                *[[day.get(name) for day in data] for name in cls.COLUMNS[:-1]],
+                [day.get('weather_code', codes.get(day.get('description'))) for day in data]
+            )
+        start, values = data
+        values = array('h', values)
+        days = len(values) // len(cls.COLUMNS)
+        return cls(date.fromisoformat(start).toordinal() if days else 0, days, values)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+import threading
+from typing import Callable, Dict, Hashable, Iterable
+from utils.metrics import metrics
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            metrics.inc('single_flight_calls_total', group=self.name, role='shared')
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        metrics.inc('single_flight_calls_total', group=self.name, role='leader')
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def do_many(self, keys: Iterable[Hashable], fn: Callable[[list], Dict]) -> Dict:
+        owned, shared = [], {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is None:
+                    self._calls[key] = _Call()
+                    owned.append(key)
+                else:
+                    shared[key] = call
+
+        if owned:
+            metrics.inc('single_flight_calls_total', len(owned), group=self.name, role='leader')
+        if shared:
+            metrics.inc('single_flight_calls_total', len(shared), group=self.name, role='shared')
+
+        results = {}
+        try:
+            if owned:
+                results = fn(owned)
+        finally:
+            with self._lock:
+                calls = [self._calls.pop(key) for key in owned]
+            for key, call in zip(owned, calls):
+                call.result = results.get(key)
+                call.event.set()
+
+        for key, call in shared.items():
+            call.event.wait()
+            if call.result is not None:
+                results[key] = call.result
+        return results
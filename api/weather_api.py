@@ -1,15 +1,99 @@
 #!/usr/bin/env python3
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
+import os
+import time
 import requests
+from api.geocoding_cache import GeocodingCache, CACHE_MISS, DEFAULT_MAX_ENTRIES
+from api.http_session import create_session
+from api.hourly import HourlyForecast, HOURLY_PARAMS
+from api.providers import OpenMeteoProvider
+from api.rate_limiter import RateLimiter, DEFAULT_RATE_LIMITS, parse_retry_after
+from api.records import CurrentWeather, DailyForecast
+from api.single_flight import SingleFlight
+from api.weather_codes import WEATHER_CODES
+from utils.metrics import metrics
+
+DEFAULT_GEOCODING_CACHE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'geocoding_cache.json'
+)
+
+# Raised while parsing a response that is missing fields or has unexpected values
+PARSE_ERRORS = (KeyError, IndexError, TypeError, ValueError)
+
+def _round(value) -> Optional[int]:
+    return None if value is None else round(value)
 
 class WeatherAPI:
-    def __init__(self):
+    def __init__(self, geocoding_cache_file: Optional[str] = DEFAULT_GEOCODING_CACHE_FILE, batch_size: int = 50,
+                 connect_timeout: float = 3.05, read_timeout: float = 10, pool_size: int = 10,
+                 retries: int = 3, backoff_factor: float = 0.5, grid_resolution: Optional[float] = None,
+                 rate_limits: Optional[List[Tuple[float, float]]] = DEFAULT_RATE_LIMITS, rate_limit_retries: int = 5,
+                 rate_limit_max_wait: Optional[Dict[int, float]] = None,
+                 geocoding_cache_size: int = DEFAULT_MAX_ENTRIES, session: Optional[requests.Session] = None,
+                 provider=None):
         self.logger = logging.getLogger(__name__)
         self.geocoding_url = "https://geocoding-api.open-meteo.com/v1/search"
         self.weather_url = "https://api.open-meteo.com/v1/forecast"
+        self.geocoding_cache = GeocodingCache(geocoding_cache_file, max_entries=geocoding_cache_size)
+        self.batch_size = batch_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = session or create_session(pool_size=pool_size, retries=retries, backoff_factor=backoff_factor)
+        self.provider = provider or OpenMeteoProvider(self.session)
+        self.grid_resolution = grid_resolution
+        self.requests_in_flight = SingleFlight('requests')
+        self.locations_in_flight = SingleFlight('locations')
+        self.rate_limiter = RateLimiter(rate_limits, rate_limit_max_wait) if rate_limits else None
+        self.rate_limit_retries = rate_limit_retries
     
+    def _get_json(self, url: str, params: Dict):
+        key = (url,) + tuple((name, tuple(value) if isinstance(value, list) else value)
+                             for name, value in sorted(params.items()))
+        return self.requests_in_flight.do(key, lambda: self._request_json(url, params))
+    
+    def _request_json(self, url: str, params: Dict):
+        endpoint = 'geocoding' if url == self.geocoding_url else 'forecast'
+        # Open-Meteo counts every location in a multi-location request against the quota
+        cost = str(params.get('latitude', '')).count(',') + 1
+        for attempt in range(self.rate_limit_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire(cost)
+            status = 'error'
+            try:
+                with metrics.timer('weather_api_request_seconds', endpoint=endpoint):
+                    response = self.provider.get(endpoint, url, params, self.timeout)
+                status = str(response.status_code)
+            finally:
+                metrics.inc('weather_api_requests_total', endpoint=endpoint, status=status)
+            if response.status_code != 429 or attempt == self.rate_limit_retries:
+                break
+
+            delay = parse_retry_after(response.headers.get('Retry-After'))
+            if delay is None:
+                delay = min(60, 2 ** attempt)
+            self.logger.warning(f"Rate limited by the {endpoint} API, retrying in {delay:g}s")
+            if self.rate_limiter:
+                self.rate_limiter.penalize(delay)
+            else:
+                time.sleep(delay)
+
+        response.raise_for_status()
+        return response.json()
+    
+    def close(self):
+        if self.rate_limiter:
+            self.rate_limiter.close()
+        self.provider.close()
+        self.session.close()
+        self.geocoding_cache.flush()
+
     def get_coordinates(self, city: str) -> Optional[Tuple[float, float]]:
+        cached = self.geocoding_cache.get(city)
+        if cached is not CACHE_MISS:
+            metrics.inc('geocoding_cache_lookups_total', result='hit')
+            return cached
+        metrics.inc('geocoding_cache_lookups_total', result='miss')
+
         try:
             params = {
                 'name': city,
@@ -18,116 +102,212 @@ class WeatherAPI:
                 'format': 'json'
             }
             
-            response = requests.get(self.geocoding_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._get_json(self.geocoding_url, params)
+            coords = None
             if data.get('results'):
                 result = data['results'][0]
-                return result['latitude'], result['longitude']
-            return None
+                coords = result['latitude'], result['longitude']
+            self.geocoding_cache.put(city, coords)
+            return coords
             
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Error getting coordinates for {city}: {str(e)}")
             return None
     
-    def get_current_weather(self, city: str) -> Optional[Dict]:
+    def seed_coordinates(self, city: str, coords: Tuple[float, float]):
+        self.geocoding_cache.pin(city, coords)
+
+    def forget_coordinates(self, city: str):
+        self.geocoding_cache.unpin(city)
+
+    def _grid_point(self, coords: Tuple[float, float]) -> Tuple[float, float]:
+        if not self.grid_resolution:
+            return coords
+        lat, lon = coords
+        return (round(round(lat / self.grid_resolution) * self.grid_resolution, 6),
+                round(round(lon / self.grid_resolution) * self.grid_resolution, 6))
+
+    CURRENT_PARAMS = ['temperature_2m', 'relative_humidity_2m', 'wind_speed_10m', 'weather_code']
+    DAILY_PARAMS = ['temperature_2m_max', 'temperature_2m_min', 'precipitation_probability_mean', 'wind_speed_10m_max', 'weather_code']
+
+    def get_current_weather(self, city: str) -> Optional[CurrentWeather]:
         try:
             coords = self.get_coordinates(city)
             if not coords:
                 return None
                 
-            lat, lon = coords
+            lat, lon = self._grid_point(coords)
             params = {
                 'latitude': lat,
                 'longitude': lon,
-                'current': ['temperature_2m', 'relative_humidity_2m', 'wind_speed_10m', 'weather_code'],
+                'current': self.CURRENT_PARAMS,
                 'timezone': 'auto'
             }
             
-            response = requests.get(self.weather_url, params=params)
-            response.raise_for_status()
+            data = self._get_json(self.weather_url, params)
+            return self._parse_current(data['current'], city)
             
-            data = response.json()
-            current = data['current']
-            weather_code = current['weather_code']
-            description = self.get_weather_description(weather_code)
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error fetching weather for {city}: {str(e)}")
+            return None
+        except PARSE_ERRORS as e:
+            self.logger.error(f"Unexpected weather response for {city}: {e!r}")
+            return None
+    
+    def get_forecast(self, city: str) -> Optional[DailyForecast]:
+        try:
+            coords = self.get_coordinates(city)
+            if not coords:
+                return None
+                
+            lat, lon = self._grid_point(coords)
+            params = {
+                'latitude': lat,
+                'longitude': lon,
+                'daily': self.DAILY_PARAMS,
+                'timezone': 'auto'
+            }
+            
+            data = self._get_json(self.weather_url, params)
+            return self._parse_forecast(data['daily'])
             
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error fetching forecast for {city}: {str(e)}")
+            return None
+        except PARSE_ERRORS as e:
+            self.logger.error(f"Unexpected forecast response for {city}: {e!r}")
+            return None
+    
+    def get_weather(self, city: str) -> Optional[Dict]:
+        try:
+            coords = self.get_coordinates(city)
+            if not coords:
+                return None
+                
+            lat, lon = self._grid_point(coords)
+            params = {
+                'latitude': lat,
+                'longitude': lon,
+                'current': self.CURRENT_PARAMS,
+                'daily': self.DAILY_PARAMS,
+                'timezone': 'auto'
+            }
+            
+            data = self._get_json(self.weather_url, params)
             return {
-                'temperature': round(current['temperature_2m']),
-                'humidity': current['relative_humidity_2m'],
-                'wind_speed': round(current['wind_speed_10m']),
-                'description': description,
-                'city_name': city
+                'current': self._parse_current(data['current'], city),
+                'forecast': self._parse_forecast(data['daily'])
             }
             
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Error fetching weather for {city}: {str(e)}")
             return None
+        except PARSE_ERRORS as e:
+            self.logger.error(f"Unexpected weather response for {city}: {e!r}")
+            return None
     
-    def get_forecast(self, city: str) -> Optional[Dict]:
+    def get_hourly_forecast(self, city: str, days: int = 16) -> Optional[HourlyForecast]:
         try:
             coords = self.get_coordinates(city)
             if not coords:
                 return None
                 
-            lat, lon = coords
+            lat, lon = self._grid_point(coords)
             params = {
                 'latitude': lat,
                 'longitude': lon,
-                'daily': ['temperature_2m_max', 'temperature_2m_min', 'precipitation_probability_mean', 'wind_speed_10m_max', 'weather_code'],
+                'hourly': HOURLY_PARAMS,
+                'forecast_days': days,
+                'wind_speed_unit': 'ms',
+                'timeformat': 'unixtime',
                 'timezone': 'auto'
             }
             
-            response = requests.get(self.weather_url, params=params)
-            response.raise_for_status()
+            data = self._get_json(self.weather_url, params)
+            return HourlyForecast.from_response(data)
             
-            data = response.json()
-            daily = data['daily']
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error fetching hourly forecast for {city}: {str(e)}")
+            return None
+        except PARSE_ERRORS as e:
+            self.logger.error(f"Unexpected hourly forecast response for {city}: {e!r}")
+            return None
+    
+    def get_weather_many(self, cities: List[str], chunk_size: Optional[int] = None) -> Dict[str, Dict]:
+        chunk_size = chunk_size or self.batch_size
+        points = {}
+        for city in cities:
+            coords = self.get_coordinates(city)
+            if coords:
+                points[city] = self._grid_point(coords)
+
+        unique = len(set(points.values()))
+        if unique < len(points):
+            metrics.inc('weather_api_locations_coalesced_total', len(points) - unique)
+
+        def fetch(keys):
+            locations = {}
+            for start in range(0, len(keys), chunk_size):
+                locations.update(self._fetch_chunk(keys[start:start + chunk_size]))
+            return locations
+
+        locations = self.locations_in_flight.do_many(points.values(), fetch)
+        results = {}
+        for city, point in points.items():
+            if point not in locations:
+                continue
+            # One malformed location only drops its own city, not the rest of the batch
+            try:
+                results[city] = {
+                    'current': self._parse_current(locations[point]['current'], city),
+                    'forecast': self._parse_forecast(locations[point]['daily'])
+                }
+            except PARSE_ERRORS as e:
+                metrics.inc('weather_api_parse_errors_total')
+                self.logger.error(f"Unexpected weather response for {city}: {e!r}")
+        return results
+    
+    def _fetch_chunk(self, points: List[Tuple[float, float]]) -> Dict[Tuple[float, float], Dict]:
+        try:
+            params = {
+                'latitude': ','.join(str(lat) for lat, _ in points),
+                'longitude': ','.join(str(lon) for _, lon in points),
+                'current': self.CURRENT_PARAMS,
+                'daily': self.DAILY_PARAMS,
+                'timezone': 'auto'
+            }
             
-            forecast = []
-            for i in range(len(daily['time'])):
-                forecast.append({
-                    'date': daily['time'][i],
-                    'temp_max': round(daily['temperature_2m_max'][i]),
-                    'temp_min': round(daily['temperature_2m_min'][i]),
-                    'precipitation_prob': daily['precipitation_probability_mean'][i],
-                    'wind_speed': round(daily['wind_speed_10m_max'][i]),
-                    'description': self.get_weather_description(daily['weather_code'][i])
-                })
+            data = self._get_json(self.weather_url, params)
+            locations = data if isinstance(data, list) else [data]
+            if len(locations) != len(points):
+                self.logger.error(f"Expected {len(points)} locations in batch response, got {len(locations)}")
+                return {}
             
-            return forecast
+            return dict(zip(points, locations))
             
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Error fetching forecast for {city}: {str(e)}")
-            return None
+            self.logger.error(f"Error fetching weather for {len(points)} locations: {str(e)}")
+            return {}
+    
+    def _parse_current(self, current: Dict, city: str) -> CurrentWeather:
+        return CurrentWeather(
+            temperature=_round(current['temperature_2m']),
+            humidity=current['relative_humidity_2m'],
+            wind_speed=_round(current['wind_speed_10m']),
+            weather_code=current['weather_code'],
+            city_name=city
+        )
+    
+    def _parse_forecast(self, daily: Dict) -> DailyForecast:
+        return DailyForecast.from_columns(
+            daily['time'],
+            daily['temperature_2m_max'],
+            daily['temperature_2m_min'],
+            daily['precipitation_probability_mean'],
+            daily['wind_speed_10m_max'],
+            daily['weather_code']
+        )
     
     @staticmethod
     def get_weather_description(code: int) -> str:
-        codes = {
-            0: "Clear sky",
-            1: "Mainly clear",
-            2: "Partly cloudy",
-            3: "Overcast",
-            45: "Foggy",
-            48: "Depositing rime fog",
-            51: "Light drizzle",
-            53: "Moderate drizzle",
-            55: "Dense drizzle",
-            61: "Slight rain",
-            63: "Moderate rain",
-            65: "Heavy rain",
-            71: "Slight snow",
-            73: "Moderate snow",
-            75: "Heavy snow",
-            77: "Snow grains",
-            80: "Slight rain showers",
-            81: "Moderate rain showers",
-            82: "Violent rain showers",
-            85: "Slight snow showers",
-            86: "Heavy snow showers",
-            95: "Thunderstorm",
-            96: "Thunderstorm with slight hail",
-            99: "Thunderstorm with heavy hail"
-        }
-        return codes.get(code, "Unknown")
+        return WEATHER_CODES.get(code, "Unknown")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from api.weather_api import WeatherAPI
+from benchmarks.mock_server import MockOpenMeteoServer
+
+def per_city(api, cities, concurrency):
+    results = {}
+    for city in cities:
+        current = api.get_current_weather(city)
+        forecast = api.get_forecast(city)
+        if current:
+            results[city] = {'current': current, 'forecast': forecast}
+    return results
+
+def combined(api, cities, concurrency):
+    results = {}
+    for city in cities:
+        bundle = api.get_weather(city)
+        if bundle:
+            results[city] = bundle
+    return results
+
+def batched(api, cities, concurrency):
+    return api.get_weather_many(cities)
+
+def concurrent_batched(api, cities, concurrency):
+    chunks = [cities[i:i + api.batch_size] for i in range(0, len(cities), api.batch_size)]
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for chunk_results in executor.map(api.get_weather_many, chunks):
+            results.update(chunk_results)
+    return results
+
+STRATEGIES = {
+    'per_city': per_city,
+    'combined': combined,
+    'batched': batched,
+    'concurrent_batched': concurrent_batched,
+}
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def make_api(server, args):
+    api = WeatherAPI(geocoding_cache_file=None, batch_size=args.batch_size, pool_size=max(10, args.concurrency),
+                     retries=args.retries, backoff_factor=args.backoff_factor, rate_limits=None)
+    api.geocoding_url = server.geocoding_url
+    api.weather_url = server.weather_url
+
+    latencies = []
+    lock = threading.Lock()
+
+    def record_latency(response, *args, **kwargs):
+        with lock:
+            latencies.append(response.elapsed.total_seconds())
+
+    api.session.hooks['response'].append(record_latency)
+    return api, latencies
+
+def run_strategy(name, server, cities, args):
+    api, latencies = make_api(server, args)
+    rounds = []
+    for round_number in range(1, args.rounds + 1):
+        server.reset_counts()
+        latencies.clear()
+        started = time.perf_counter()
+        results = STRATEGIES[name](api, cities, args.concurrency)
+        elapsed = time.perf_counter() - started
+        counts = dict(server.counts)
+        rounds.append({
+            'round': round_number,
+            'elapsed_s': elapsed,
+            'cities_per_s': len(cities) / elapsed if elapsed else None,
+            'succeeded': len(results),
+            'requests': counts['geocoding'] + counts['forecast'],
+            'geocoding_requests': counts['geocoding'],
+            'forecast_requests': counts['forecast'],
+            'errors_injected': counts['errors'],
+            'rate_limited_injected': counts['rate_limited'],
+            'latency_p50_ms': (percentile(latencies, 0.5) or 0) * 1000,
+            'latency_p99_ms': (percentile(latencies, 0.99) or 0) * 1000,
+        })
+    return {'strategy': name, 'rounds': rounds}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure WeatherAPI throughput against a local Open-Meteo stand-in")
+    parser.add_argument('--cities', type=int, default=200, help="Number of cities to refresh")
+    parser.add_argument('--strategies', nargs='+', choices=sorted(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument('--rounds', type=int, default=2, help="Refresh rounds per strategy (later rounds hit a warm geocoding cache)")
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--backoff-factor', type=float, default=0.05)
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--latency-jitter-ms', type=float, default=5.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, 'benchmarks', 'results', 'api_benchmark.json'),
+                        help="Path of the JSON results file")
+    args = parser.parse_args(argv)
+
+    server = MockOpenMeteoServer(latency_ms=args.latency_ms, latency_jitter_ms=args.latency_jitter_ms,
+                                 error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                                 retry_after=0, seed=args.seed).start()
+    cities = [f"City {i}" for i in range(args.cities)]
+    runs = []
+    try:
+        for name in args.strategies:
+            result = run_strategy(name, server, cities, args)
+            runs.append(result)
+            for r in result['rounds']:
+                print(f"{name:>18} round {r['round']}: {r['elapsed_s']:.2f}s, {r['cities_per_s']:.1f} cities/s, "
+                      f"{r['requests']} requests, p50 {r['latency_p50_ms']:.1f}ms, p99 {r['latency_p99_ms']:.1f}ms, "
+                      f"{r['succeeded']}/{len(cities)} ok")
+    finally:
+        server.stop()
+
+    report = {
+        'benchmark': 'api',
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'runs': runs
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class MockOpenMeteoServer:
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0.0, latency_jitter_ms=0.0,
+                 error_rate=0.0, rate_limit_rate=0.0, retry_after=1, seed=None):
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.counts = {'geocoding': 0, 'forecast': 0, 'errors': 0, 'rate_limited': 0}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def geocoding_url(self):
+        return f"{self.base_url}/v1/search"
+
+    @property
+    def weather_url(self):
+        return f"{self.base_url}/v1/forecast"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_counts(self):
+        with self.lock:
+            for key in self.counts:
+                self.counts[key] = 0
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                server.handle(self, url.path, parse_qs(url.query))
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def handle(self, handler, path, query):
+        if path == '/v1/search':
+            endpoint = 'geocoding'
+        elif path == '/v1/forecast':
+            endpoint = 'forecast'
+        else:
+            self._send(handler, 404, {'error': True, 'reason': 'Not found'})
+            return
+
+        with self.lock:
+            self.counts[endpoint] += 1
+            roll = self.random.random()
+            delay = max(0.0, self.latency_ms + self.random.uniform(-1, 1) * self.latency_jitter_ms) / 1000
+
+        if delay:
+            time.sleep(delay)
+
+        if roll < self.rate_limit_rate:
+            with self.lock:
+                self.counts['rate_limited'] += 1
+            self._send(handler, 429, {'error': True, 'reason': 'Too many requests'},
+                       {'Retry-After': str(self.retry_after)})
+            return
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self.lock:
+                self.counts['errors'] += 1
+            self._send(handler, 503, {'error': True, 'reason': 'Service unavailable'})
+            return
+
+        if endpoint == 'geocoding':
+            self._send(handler, 200, geocode(query.get('name', [''])[0]))
+        else:
+            self._send(handler, 200, forecast(query))
+
+    @staticmethod
+    def _send(handler, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+def _seed(*parts):
+    return zlib.crc32('|'.join(str(part) for part in parts).encode())
+
+def geocode(name):
+    if not name.strip():
+        return {'generationtime_ms': 0.1}
+    seed = _seed(name.strip().casefold())
+    return {
+        'results': [{
+            'name': name,
+            'latitude': round((seed % 17000) / 100 - 85, 4),
+            'longitude': round((seed // 17000 % 36000) / 100 - 180, 4),
+        }],
+        'generationtime_ms': 0.1
+    }
+
+def _location(lat, lon, current, daily, hourly_days=0):
+    seed = _seed(lat, lon)
+    rnd = random.Random(seed)
+    location = {'latitude': float(lat), 'longitude': float(lon), 'timezone': 'GMT'}
+    if current:
+        location['current'] = {
+            'time': time.strftime('%Y-%m-%dT%H:%M', time.gmtime()),
+            'temperature_2m': round(rnd.uniform(-20, 35), 1),
+            'relative_humidity_2m': rnd.randint(10, 100),
+            'wind_speed_10m': round(rnd.uniform(0, 25), 1),
+            'weather_code': rnd.choice([0, 1, 2, 3, 45, 61, 63, 71, 80, 95])
+        }
+    if daily:
+        today = date.today()
+        days = range(7)
+        location['daily'] = {
+            'time': [(today + timedelta(days=i)).isoformat() for i in days],
+            'temperature_2m_max': [round(rnd.uniform(5, 35), 1) for _ in days],
+            'temperature_2m_min': [round(rnd.uniform(-20, 5), 1) for _ in days],
+            'precipitation_probability_mean': [rnd.randint(0, 100) for _ in days],
+            'wind_speed_10m_max': [round(rnd.uniform(0, 30), 1) for _ in days],
+            'weather_code': [rnd.choice([0, 1, 2, 3, 61, 71, 95]) for _ in days]
+        }
+    if hourly_days:
+        start = int(time.time()) // 3600 * 3600
+        hours = range(hourly_days * 24)
+        location['utc_offset_seconds'] = 0
+        location['hourly'] = {
+            'time': [start + i * 3600 for i in hours],
+            'temperature_2m': [round(10 + 8 * rnd.random() + 6 * ((i % 24) / 12 - 1) ** 2, 1) for i in hours],
+            'precipitation_probability': [rnd.randint(0, 100) for _ in hours],
+            'precipitation': [round(max(0.0, rnd.gauss(0, 1)), 1) for _ in hours],
+            'wind_speed_10m': [round(rnd.uniform(0, 15), 1) for _ in hours],
+            'weather_code': [rnd.choice([0, 1, 2, 3, 61, 71, 95]) for _ in hours]
+        }
+    return location
+
+def forecast(query):
+    latitudes = query.get('latitude', [''])[0].split(',')
+    longitudes = query.get('longitude', [''])[0].split(',')
+    hourly_days = int(query.get('forecast_days', ['7'])[0]) if 'hourly' in query else 0
+    locations = [
+        _location(lat, lon, 'current' in query, 'daily' in query, hourly_days)
+        for lat, lon in zip(latitudes, longitudes)
+    ]
+    return locations if len(locations) > 1 else locations[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Open-Meteo geocoding and forecast APIs")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Mean added latency per request")
+    parser.add_argument('--latency-jitter-ms', type=float, default=0.0, help="Uniform jitter around the mean latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with 429 responses")
+    args = parser.parse_args(argv)
+
+    server = MockOpenMeteoServer(args.host, args.port, args.latency_ms, args.latency_jitter_ms,
+                                 args.error_rate, args.rate_limit_rate, args.retry_after)
+    print(f"Serving mock Open-Meteo on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+
+class StubWeatherAPI:
+    def __init__(self, batch_size=50):
+        self.batch_size = batch_size
+        self.calls = 0
+
+    def get_weather_many(self, cities):
+        self.calls += 1
+        return {city: make_bundle(city, self.calls) for city in cities}
+
+    def close(self):
+        pass
+
+def make_bundle(city, seed=0):
+    base = (hash(city) + seed) % 40 - 10
+    today = date.today()
+    return {
+        'current': {
+            'temperature': base,
+            'humidity': 40 + base % 50,
+            'wind_speed': base % 15,
+            'description': "Partly cloudy",
+            'weather_code': 2,
+            'city_name': city
+        },
+        'forecast': [
+            {
+                'date': (today + timedelta(days=i)).isoformat(),
+                'temp_max': base + i + 5,
+                'temp_min': base + i,
+                'precipitation_prob': (seed + i * 10) % 100,
+                'wind_speed': (base + i) % 15,
+                'description': "Slight rain"
+            }
+            for i in range(7)
+        ]
+    }
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def run_size(size):
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QEventLoop, QTimer
+    from ui.main_window import MainWindow, WeatherCard
+    from data.data_manager import DataManager
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    cities = [f"City {i}" for i in range(size)]
+    bundles = {city: make_bundle(city) for city in cities}
+    results = {'cities': size}
+
+    cards = []
+    results['card_creation_s'] = timed(
+        lambda: cards.extend(WeatherCard(city, bundles[city]['current']) for city in cities)
+    )
+    results['update_forecast_s'] = timed(
+        lambda: [card.update_forecast(bundles[card.city_name]['forecast']) for card in cards]
+    )
+    results['toggle_forecast_s'] = timed(lambda: [card.toggle_forecast() for card in cards])
+    for card in cards:
+        card.deleteLater()
+    cards.clear()
+    app.processEvents()
+
+    data_dir = tempfile.mkdtemp(prefix='weather-bench-')
+    data_manager = DataManager(data_dir=data_dir, flush_delay=3600)
+    data_manager.save_cities(cities)
+    for city in cities:
+        data_manager.update_weather_data(city, bundles[city])
+
+    window = MainWindow()
+    window.list_view_threshold = size + 1
+    window.set_api(StubWeatherAPI())
+    results['startup_s'] = timed(lambda: window.set_data_manager(data_manager))
+    window.resize(1200, 800)
+    window.show()
+    app.processEvents()
+
+    def refresh_cycle():
+        loop = QEventLoop()
+        window.fetch_engine.finished.connect(loop.quit)
+        QTimer.singleShot(300000, loop.quit)
+        window.update_weather()
+        loop.exec_()
+        window.fetch_engine.finished.disconnect(loop.quit)
+
+    results['update_weather_s'] = timed(refresh_cycle)
+
+    scroll = window.content_stack.widget(0)
+    scrollbar = scroll.verticalScrollBar()
+    step = max(1, scroll.viewport().height())
+    frames = 0
+    started = time.perf_counter()
+    for value in range(0, scrollbar.maximum() + step, step):
+        scrollbar.setValue(value)
+        scroll.viewport().repaint()
+        app.processEvents()
+        frames += 1
+    elapsed = time.perf_counter() - started
+    results['scroll_s'] = elapsed
+    results['scroll_frames'] = frames
+    results['scroll_ms_per_frame'] = elapsed * 1000 / frames if frames else 0
+
+    results['widget_count'] = len(app.allWidgets())
+    results['peak_rss_kb'] = peak_rss_kb()
+
+    window.close()
+    data_manager.history.close()
+    return results
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, text=True).strip()
+    except Exception:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark MainWindow and WeatherCard under the offscreen platform")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="City counts to benchmark")
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, 'benchmarks', 'results', 'ui_benchmark.json'),
+                        help="Path of the JSON results file")
+    parser.add_argument('--single', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.single is not None:
+        print(json.dumps(run_size(args.single)))
+        return 0
+
+    runs = []
+    for size in args.sizes:
+        # Each size runs in its own process so peak RSS and widget counts are not shared between runs.
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--single', str(size)], text=True)
+        result = json.loads(output.strip().splitlines()[-1])
+        runs.append(result)
+        print(f"{size:>6} cities: cards {result['card_creation_s']:.3f}s, "
+              f"refresh {result['update_weather_s']:.3f}s, "
+              f"scroll {result['scroll_ms_per_frame']:.2f}ms/frame, "
+              f"{result['widget_count']} widgets, {result['peak_rss_kb'] / 1024:.1f} MiB peak")
+
+    report = {
+        'benchmark': 'ui',
+        'timestamp': time.time(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'qpa_platform': os.environ.get('QT_QPA_PLATFORM'),
+        'runs': runs
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,70 +2,174 @@
 import json
 import os
 import logging
-from typing import List, Dict, Optional
+import tempfile
+import threading
+import time
+from typing import List, Dict, Optional, Tuple
+from api.records import CurrentWeather, DailyForecast
+from data.history_store import HistoryStore
+from utils.metrics import metrics
 
 class DataManager:
-    def __init__(self):
+    def __init__(self, data_dir: Optional[str] = None, flush_delay: float = 2.0):
         self.logger = logging.getLogger(__name__)
-        self.data_dir = os.path.dirname(os.path.abspath(__file__))
+        self.data_dir = data_dir or os.path.dirname(os.path.abspath(__file__))
         self.cities_file = os.path.join(self.data_dir, 'cities.json')
         self.weather_file = os.path.join(self.data_dir, 'weather_data.json')
-        self._ensure_data_file()
-        self._ensure_weather_file()
-    
-    def _ensure_data_file(self):
-        if not os.path.exists(self.cities_file):
-            with open(self.cities_file, 'w') as f:
-                json.dump([], f)
-    
-    def _ensure_weather_file(self):
-        if not os.path.exists(self.weather_file):
-            with open(self.weather_file, 'w') as f:
-                json.dump({}, f)
-    
-    def load_cities(self) -> List[str]:
+        self.alerts_file = os.path.join(self.data_dir, 'alerts.json')
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._flush_timer = None
+        self._dirty = set()
+        self._pending_observations = []
+        self.history = HistoryStore(os.path.join(self.data_dir, 'history.db'))
+        saved_cities = self._read_json(self.cities_file, [], "cities")
+        # Cities picked from autocomplete keep their coordinates, since the label alone may not geocode
+        if isinstance(saved_cities, dict):
+            self._cities = list(saved_cities.get('cities', []))
+            self._coordinates = {city: tuple(coords) for city, coords in saved_cities.get('coordinates', {}).items()}
+        else:
+            self._cities = saved_cities
+            self._coordinates = {}
+        self._weather_data = self._decode_weather(self._read_json(self.weather_file, {}, "weather data"))
+
+    def _read_json(self, path: str, default, label: str):
+        if not os.path.exists(path):
+            return default
         try:
-            with open(self.cities_file, 'r') as f:
-                return json.load(f)
+            with metrics.timer('data_manager_io_seconds', op='read', file=os.path.basename(path)):
+                with open(path, 'r') as f:
+                    return json.load(f)
         except Exception as e:
-            self.logger.error(f"Error loading cities: {str(e)}")
-            return []
-    
-    def save_cities(self, cities: List[str]):
+            self.logger.error(f"Error loading {label}: {str(e)}")
+            return default
+
+    def _decode_weather(self, data: Dict) -> Dict:
+        decoded = {}
+        for city, entry in data.items():
+            try:
+                decoded[city] = dict(
+                    entry,
+                    current=CurrentWeather.from_json(entry['current']) if entry.get('current') else None,
+                    forecast=DailyForecast.from_json(entry['forecast']) if entry.get('forecast') else None
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.error(f"Skipping saved weather for {city}: {str(e)}")
+        return decoded
+
+    @staticmethod
+    def _encode_weather(data: Dict) -> Dict:
+        encoded = {}
+        for city, entry in data.items():
+            current, forecast = entry.get('current'), entry.get('forecast')
+            encoded[city] = dict(
+                entry,
+                current=current.to_json() if isinstance(current, CurrentWeather) else current,
+                forecast=forecast.to_json() if isinstance(forecast, DailyForecast) else forecast
+            )
+        return encoded
+
+    def _write_json(self, path: str, data, label: str):
         try:
-            with open(self.cities_file, 'w') as f:
-                json.dump(cities, f)
+            with metrics.timer('data_manager_io_seconds', op='write', file=os.path.basename(path)):
+                fd, tmp_path = tempfile.mkstemp(dir=self.data_dir, prefix='.', suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'w') as f:
+                        json.dump(data, f)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
         except Exception as e:
-            self.logger.error(f"Error saving cities: {str(e)}")
-    
+            self.logger.error(f"Error saving {label}: {str(e)}")
+
+    def _mark_dirty(self, path: str):
+        with self._lock:
+            self._dirty.add(path)
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        # The write lock keeps snapshots on disk in order; the data lock is only held long enough to
+        # take shallow copies, so callers on the GUI thread never wait for encoding or disk I/O
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                dirty, self._dirty = self._dirty, set()
+                cities = None
+                if self.cities_file in dirty:
+                    cities = list(self._cities)
+                    if self._coordinates:
+                        cities = {'cities': cities, 'coordinates': dict(self._coordinates)}
+                weather_data = dict(self._weather_data) if self.weather_file in dirty else None
+                observations, self._pending_observations = self._pending_observations, []
+
+            if cities is not None:
+                self._write_json(self.cities_file, cities, "cities")
+            if weather_data is not None:
+                self._write_json(self.weather_file, self._encode_weather(weather_data), "weather data")
+
+            with metrics.timer('data_manager_io_seconds', op='write', file='history'):
+                self.history.record_many(observations)
+                self.history.maybe_compact()
+
+    def close(self):
+        self.flush()
+        self.history.close()
+
+    def load_cities(self) -> List[str]:
+        with self._lock:
+            return list(self._cities)
+
+    def load_city_coordinates(self) -> Dict[str, Tuple[float, float]]:
+        with self._lock:
+            return dict(self._coordinates)
+
+    def save_cities(self, cities: List[str]):
+        with self._lock:
+            self._cities = list(cities)
+            self._coordinates = {city: coords for city, coords in self._coordinates.items() if city in cities}
+            self._mark_dirty(self.cities_file)
+
+    def load_alert_rules(self) -> List:
+        return self._read_json(self.alerts_file, [], "alert rules")
+
     def load_weather_data(self) -> Dict:
-        try:
-            with open(self.weather_file, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            self.logger.error(f"Error loading weather data: {str(e)}")
-            return {}
-    
+        with self._lock:
+            return dict(self._weather_data)
+
     def save_weather_data(self, data: Dict):
-        try:
-            with open(self.weather_file, 'w') as f:
-                json.dump(data, f)
-        except Exception as e:
-            self.logger.error(f"Error saving weather data: {str(e)}")
-    
-    def add_city(self, city: str):
-        cities = self.load_cities()
-        if city not in cities:
-            cities.append(city)
-            self.save_cities(cities)
-    
+        with self._lock:
+            self._weather_data = dict(data)
+            self._mark_dirty(self.weather_file)
+
+    def add_city(self, city: str, coordinates: Optional[Tuple[float, float]] = None):
+        with self._lock:
+            if city not in self._cities:
+                self._cities.append(city)
+                self._mark_dirty(self.cities_file)
+            if coordinates is not None:
+                self._coordinates[city] = (coordinates[0], coordinates[1])
+                self._mark_dirty(self.cities_file)
+
     def remove_city(self, city: str):
-        cities = self.load_cities()
-        if city in cities:
-            cities.remove(city)
-            self.save_cities(cities)
-    
+        with self._lock:
+            if city in self._cities:
+                self._cities.remove(city)
+                self._coordinates.pop(city, None)
+                self._mark_dirty(self.cities_file)
+
     def update_weather_data(self, city: str, data: Dict):
-        weather_data = self.load_weather_data()
-        weather_data[city] = data
-        self.save_weather_data(weather_data)
+        with self._lock:
+            now = time.time()
+            self._weather_data[city] = dict(data, fetched_at=now)
+            if 'current' in data:
+                self._pending_observations.append((city, data['current'], now))
+            self._mark_dirty(self.weather_file)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+from array import array
+from bisect import bisect_left
+import heapq
+import logging
+import os
+import threading
+import unicodedata
+from typing import List, NamedTuple, Optional, Tuple
+from utils.metrics import metrics
+
+DEFAULT_GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gazetteer.tsv')
+
+FOLD_TABLE = str.maketrans({'ł': 'l', 'ø': 'o', 'đ': 'd', 'ð': 'd', 'þ': 'th', 'æ': 'ae', 'œ': 'oe', 'ı': 'i'})
+
+def fold(text: str) -> str:
+    if text.isascii():
+        return ' '.join(text.casefold().split())
+    text = unicodedata.normalize('NFKD', text.casefold().translate(FOLD_TABLE))
+    return ' '.join(''.join(c for c in text if not unicodedata.combining(c)).split())
+
+class Place(NamedTuple):
+    name: str
+    country: str
+    admin1: str
+    latitude: float
+    longitude: float
+    population: int
+
+    @property
+    def label(self) -> str:
+        return ', '.join(part for part in (self.name, self.admin1, self.country) if part)
+
+class Gazetteer:
+    def __init__(self, path: Optional[str] = None, limit: int = 10):
+        self.logger = logging.getLogger(__name__)
+        self.path = path or DEFAULT_GAZETTEER_FILE
+        self.limit = limit
+        self.places: List[Place] = []
+        self._keys: List[str] = []
+        self._ids = array('l')
+        self._by_population = array('l')
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def _parse_line(self, line: str) -> Tuple[Place, str]:
+        fields = line.rstrip('\n').split('\t')
+        if len(fields) >= 15:
+            # GeoNames dump: name, asciiname, ..., lat, lon, ..., country, ..., admin1 code, ..., population
+            place = Place(fields[1], fields[8], fields[10], float(fields[4]), float(fields[5]), int(fields[14] or 0))
+            return place, fields[2]
+        place = Place(fields[0], fields[1], fields[2], float(fields[3]), float(fields[4]), int(fields[5]))
+        return place, fields[0]
+
+    def load(self):
+        with self._lock:
+            if self.loaded:
+                return
+            with metrics.timer('gazetteer_load_seconds'):
+                self._build()
+            self.loaded = True
+
+    def _build(self):
+        index = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip() or line.startswith('#'):
+                        continue
+                    try:
+                        place, ascii_name = self._parse_line(line)
+                    except (ValueError, IndexError):
+                        continue
+                    place_id = len(self.places)
+                    self.places.append(place)
+                    key = fold(place.name)
+                    index.append((key, place_id))
+                    if ascii_name != place.name:
+                        ascii_key = fold(ascii_name)
+                        if ascii_key != key:
+                            index.append((ascii_key, place_id))
+        except OSError as e:
+            self.logger.error(f"Error loading gazetteer {self.path}: {str(e)}")
+            return
+
+        index.sort()
+        self._keys = [key for key, _ in index]
+        self._ids = array('l', (place_id for _, place_id in index))
+
+        self._by_population = array('l', sorted(range(len(self._ids)),
+                                                key=lambda pos: -self.places[self._ids[pos]].population))
+        self.logger.info(f"Loaded {len(self.places)} places from {self.path}")
+
+    def suggest(self, text: str, limit: Optional[int] = None) -> List[Place]:
+        self.load()
+        limit = limit or self.limit
+        prefix = fold(text)
+        if not prefix:
+            return []
+
+        with metrics.timer('gazetteer_suggest_seconds'):
+            start = bisect_left(self._keys, prefix)
+            end = bisect_left(self._keys, prefix + '\uffff', start)
+            matches = end - start
+            # Wide ranges ("s", "san") are cheaper to answer by walking places in population
+            # order until enough fall inside the range; narrow ones are ranked directly.
+            if matches * matches > limit * len(self._ids):
+                best = []
+                for pos in self._by_population:
+                    if start <= pos < end and self._ids[pos] not in best:
+                        best.append(self._ids[pos])
+                        if len(best) == limit:
+                            break
+            else:
+                ids = set(self._ids[start:end])
+                best = heapq.nlargest(limit, ids, key=lambda place_id: self.places[place_id].population)
+            return [self.places[place_id] for place_id in best]
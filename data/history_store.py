@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+HOUR = 3600
+DAY = 86400
+
+RAW_COLUMNS = ('ts', 'temperature', 'humidity', 'wind_speed', 'weather_code')
+AGGREGATE_COLUMNS = ('ts', 'temperature_min', 'temperature_max', 'temperature_avg', 'humidity_avg',
+                     'wind_speed_avg', 'wind_speed_max', 'weather_code', 'samples')
+
+class HistoryStore:
+    def __init__(self, db_path: str, raw_retention: float = 3 * DAY, hourly_retention: float = 60 * DAY,
+                 daily_retention: float = 730 * DAY, compact_interval: float = HOUR):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.raw_retention = raw_retention
+        self.hourly_retention = hourly_retention
+        self.daily_retention = daily_retention
+        self.compact_interval = compact_interval
+        self.last_compaction = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS observations (
+                    city TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    temperature REAL,
+                    humidity REAL,
+                    wind_speed REAL,
+                    weather_code INTEGER,
+                    PRIMARY KEY (city, ts)
+                ) WITHOUT ROWID
+            """)
+            for table in ('observations_hourly', 'observations_daily'):
+                self._conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        city TEXT NOT NULL,
+                        ts INTEGER NOT NULL,
+                        temperature_min REAL,
+                        temperature_max REAL,
+                        temperature_avg REAL,
+                        humidity_avg REAL,
+                        wind_speed_avg REAL,
+                        wind_speed_max REAL,
+                        weather_code INTEGER,
+                        samples INTEGER NOT NULL,
+                        PRIMARY KEY (city, ts)
+                    ) WITHOUT ROWID
+                """)
+
+    def record(self, city: str, current: Dict, ts: Optional[float] = None):
+        self.record_many([(city, current, ts)])
+
+    def record_many(self, observations: Iterable[Tuple[str, Dict, Optional[float]]]):
+        now = time.time()
+        rows = [
+            (city, int(ts if ts is not None else now), current.get('temperature'), current.get('humidity'),
+             current.get('wind_speed'), current.get('weather_code'))
+            for city, current, ts in observations
+        ]
+        if not rows:
+            return
+
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+        except sqlite3.Error as e:
+            self.logger.error(f"Error recording observations: {str(e)}")
+
+    def query(self, city: str, start: float, end: float, resolution: str = 'raw') -> List[Dict]:
+        if resolution == 'raw':
+            table, columns = 'observations', RAW_COLUMNS
+        elif resolution == 'hourly':
+            table, columns = 'observations_hourly', AGGREGATE_COLUMNS
+        elif resolution == 'daily':
+            table, columns = 'observations_daily', AGGREGATE_COLUMNS
+        else:
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        try:
+            with self._lock:
+                cursor = self._conn.execute(
+                    f"SELECT {', '.join(columns)} FROM {table} WHERE city = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                    (city, int(start), int(end))
+                )
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Error querying history for {city}: {str(e)}")
+            return []
+
+    def maybe_compact(self, now: Optional[float] = None):
+        now = now if now is not None else time.time()
+        if now - self.last_compaction >= self.compact_interval:
+            self.compact(now)
+
+    def compact(self, now: Optional[float] = None):
+        now = now if now is not None else time.time()
+        raw_cutoff = int(now - self.raw_retention) // HOUR * HOUR
+        hourly_cutoff = int(now - self.hourly_retention) // DAY * DAY
+        daily_cutoff = int(now - self.daily_retention)
+
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(f"""
+                    INSERT INTO observations_hourly
+                    SELECT city, ts / {HOUR} * {HOUR} AS bucket,
+                           MIN(temperature), MAX(temperature), AVG(temperature), AVG(humidity),
+                           AVG(wind_speed), MAX(wind_speed), MAX(weather_code), COUNT(*)
+                    FROM observations WHERE ts < ?
+                    GROUP BY city, bucket
+                    {self._merge_clause()}
+                """, (raw_cutoff,))
+                self._conn.execute("DELETE FROM observations WHERE ts < ?", (raw_cutoff,))
+
+                self._conn.execute(f"""
+                    INSERT INTO observations_daily
+                    SELECT city, ts / {DAY} * {DAY} AS bucket,
+                           MIN(temperature_min), MAX(temperature_max),
+                           SUM(temperature_avg * samples) / SUM(samples), SUM(humidity_avg * samples) / SUM(samples),
+                           SUM(wind_speed_avg * samples) / SUM(samples), MAX(wind_speed_max), MAX(weather_code),
+                           SUM(samples)
+                    FROM observations_hourly WHERE ts < ?
+                    GROUP BY city, bucket
+                    {self._merge_clause()}
+                """, (hourly_cutoff,))
+                self._conn.execute("DELETE FROM observations_hourly WHERE ts < ?", (hourly_cutoff,))
+
+                self._conn.execute("DELETE FROM observations_daily WHERE ts < ?", (daily_cutoff,))
+            self.last_compaction = now
+        except sqlite3.Error as e:
+            self.logger.error(f"Error compacting history: {str(e)}")
+
+    @staticmethod
+    def _merge_clause() -> str:
+        return """
+            ON CONFLICT (city, ts) DO UPDATE SET
+                temperature_min = MIN(temperature_min, excluded.temperature_min),
+                temperature_max = MAX(temperature_max, excluded.temperature_max),
+                temperature_avg = (temperature_avg * samples + excluded.temperature_avg * excluded.samples)
+                                  / (samples + excluded.samples),
+                humidity_avg = (humidity_avg * samples + excluded.humidity_avg * excluded.samples)
+                               / (samples + excluded.samples),
+                wind_speed_avg = (wind_speed_avg * samples + excluded.wind_speed_avg * excluded.samples)
+                                 / (samples + excluded.samples),
+                wind_speed_max = MAX(wind_speed_max, excluded.wind_speed_max),
+                weather_code = MAX(weather_code, excluded.weather_code),
+                samples = samples + excluded.samples
+        """
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from alerts.engine import AlertEngine
+from api.geocoding_cache import cache_size_for
+from api.http_session import create_session
+from api.providers import create_provider
+from api.weather_api import DEFAULT_GEOCODING_CACHE_FILE, WeatherAPI
+from data.data_manager import DataManager
+from utils.logging_setup import configure_logging
+from utils.metrics import metrics, start_http_server
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Poll weather for a list of cities without the GUI")
+    parser.add_argument('cities', nargs='*', help="City names (defaults to the saved city list)")
+    parser.add_argument('--cities-file', help="File with one city name per line")
+    parser.add_argument('--interval', type=float, default=600, help="Seconds between polling cycles")
+    parser.add_argument('--concurrency', type=int, default=4, help="Number of parallel request workers")
+    parser.add_argument('--batch-size', type=int, default=50, help="Cities per forecast request")
+    parser.add_argument('--grid-resolution', type=float,
+                        help="Snap coordinates to a grid of this many degrees so nearby cities share one response")
+    parser.add_argument('--max-per-minute', type=int, default=600, help="Upstream calls allowed per minute (0 for no limit)")
+    parser.add_argument('--max-per-hour', type=int, default=5000, help="Upstream calls allowed per hour (0 for no limit)")
+    parser.add_argument('--max-per-day', type=int, default=10000, help="Upstream calls allowed per day (0 for no limit)")
+    parser.add_argument('--output', default='-', help="JSON Lines output file ('-' for stdout)")
+    parser.add_argument('--data-dir', help="Directory for saved cities, snapshots and history "
+                                           "(a temporary directory when replaying)")
+    parser.add_argument('--alert', action='append', default=[], metavar='RULE',
+                        help="Alert rule such as 'wind_speed > 20' or 'Berlin: forecast.precipitation_prob[1] > 80' "
+                             "(adds to the rules in alerts.json)")
+    parser.add_argument('--geocoding-cache-size', type=int,
+                        help="Geocoded cities kept in memory (default: twice the number of polled cities, at least 5000)")
+    parser.add_argument('--record', metavar='ARCHIVE', help="Record upstream responses to this archive")
+    parser.add_argument('--replay', metavar='ARCHIVE',
+                        help="Serve responses from a recorded archive instead of Open-Meteo (disables rate limits)")
+    parser.add_argument('--replay-speed', type=float,
+                        help="Replay recorded latencies at this multiple of real time (default: as fast as possible)")
+    parser.add_argument('--synthetic-cities', type=int, metavar='N',
+                        help="With --replay, poll N cities, synthesizing responses beyond those recorded")
+    parser.add_argument('--once', action='store_true', help="Run a single polling cycle and exit")
+    parser.add_argument('--log-file', help="Also write logs to this file, rotated at 5 MB")
+    parser.add_argument('--log-json', action='store_true', help="Write log records as JSON lines")
+    parser.add_argument('--metrics-port', type=int, help="Serve Prometheus metrics on this local port")
+    args = parser.parse_args(argv)
+    if args.record and args.replay:
+        parser.error("--record and --replay cannot be combined")
+    if args.synthetic_cities and not args.replay:
+        parser.error("--synthetic-cities requires --replay")
+    return args
+
+def load_city_list(args, data_manager):
+    cities = list(args.cities)
+    if args.cities_file:
+        with open(args.cities_file, 'r') as f:
+            cities.extend(line.strip() for line in f if line.strip())
+    if not cities:
+        cities = data_manager.load_cities()
+    return list(dict.fromkeys(cities))
+
+def poll_once(api, data_manager, alert_engine, cities, executor, output):
+    logger = logging.getLogger(__name__)
+    chunks = [cities[i:i + api.batch_size] for i in range(0, len(cities), api.batch_size)]
+    futures = {executor.submit(api.get_weather_many, chunk): chunk for chunk in chunks}
+    fetched = 0
+    for future in as_completed(futures):
+        try:
+            results = future.result()
+        except Exception as e:
+            logger.error(f"Error polling {len(futures[future])} cities: {str(e)}")
+            results = {}
+        fetched_at = time.time()
+        for city in futures[future]:
+            bundle = results.get(city)
+            if not bundle:
+                output.write(json.dumps({'city': city, 'fetched_at': fetched_at, 'error': 'fetch failed'}) + '\n')
+                continue
+            data_manager.update_weather_data(city, bundle)
+            output.write(json.dumps({'city': city, 'fetched_at': fetched_at, 'current': bundle['current'].to_dict(),
+                                     'forecast': bundle['forecast'].to_list()}) + '\n')
+            fetched += 1
+            raised, cleared = alert_engine.update(city, bundle['current'], bundle['forecast'], fetched_at)
+            for alert in raised:
+                output.write(json.dumps(dict(alert.to_dict(), state='raised')) + '\n')
+            for alert in cleared:
+                output.write(json.dumps(dict(alert.to_dict(), state='cleared')) + '\n')
+        output.flush()
+    return fetched
+
+def create_api(args, session, provider, city_count=0):
+    rate_limits = [(count, period) for count, period in
+                   ((args.max_per_minute, 60), (args.max_per_hour, 3600), (args.max_per_day, 86400)) if count]
+    if args.replay:
+        # Replayed and synthetic cities must not end up in the real geocoding cache or count against the quota
+        rate_limits = None
+    cache_size = args.geocoding_cache_size or cache_size_for(city_count)
+    # A poll cycle waits for quota instead of failing cities; only the GUI pool caps its waits
+    return WeatherAPI(geocoding_cache_file=None if args.replay else DEFAULT_GEOCODING_CACHE_FILE,
+                      batch_size=args.batch_size, grid_resolution=args.grid_resolution, rate_limits=rate_limits,
+                      rate_limit_max_wait={}, geocoding_cache_size=cache_size, session=session, provider=provider)
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging(args.log_file, json_format=args.log_json)
+    logger = logging.getLogger(__name__)
+
+    session = create_session(pool_size=args.concurrency)
+    provider = create_provider(session, args.record, args.replay, args.replay_speed)
+    data_dir = args.data_dir
+    if args.replay and not data_dir:
+        data_dir = tempfile.mkdtemp(prefix='weather-replay-')
+        logger.info(f"Replaying with data directory {data_dir}")
+    data_manager = DataManager(data_dir=data_dir)
+    cities = load_city_list(args, data_manager)
+    if args.synthetic_cities:
+        cities = provider.city_names(args.synthetic_cities)
+    api = create_api(args, session, provider, len(cities))
+    alert_engine = AlertEngine(data_manager.load_alert_rules() + args.alert, history_store=data_manager.history)
+    if not cities:
+        logger.error("No cities to poll")
+        api.close()
+        data_manager.close()
+        return 1
+
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+        logger.info(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'a')
+    logger.info(f"Polling {len(cities)} cities every {args.interval:g}s with {args.concurrency} workers")
+
+    executor = ThreadPoolExecutor(max_workers=args.concurrency)
+    try:
+        while True:
+            started = time.monotonic()
+            fetched = poll_once(api, data_manager, alert_engine, cities, executor, output)
+            elapsed = time.monotonic() - started
+            metrics.observe('refresh_cycle_seconds', elapsed)
+            metrics.inc('refresh_cities_total', len(cities))
+            logger.info(f"Fetched {fetched}/{len(cities)} cities in {elapsed:.2f}s")
+            if args.once:
+                break
+            time.sleep(max(0, args.interval - elapsed))
+    except KeyboardInterrupt:
+        logger.info("Stopping poller")
+    finally:
+        # Closing the API first wakes workers waiting for quota so the executor can drain
+        api.close()
+        executor.shutdown(cancel_futures=True)
+        data_manager.close()
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
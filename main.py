@@ -1,42 +1,77 @@
 #!/usr/bin/env python3
 import sys
 import os
+import argparse
 import logging
+import tempfile
 from PyQt5.QtWidgets import QApplication
 from qt_material import apply_stylesheet
 from ui.main_window import MainWindow
+from alerts.engine import AlertEngine
+from api.geocoding_cache import cache_size_for
+from api.http_session import create_session
+from api.providers import create_provider
 from api.weather_api import WeatherAPI
 from data.data_manager import DataManager
+from data.gazetteer import Gazetteer
+from utils.logging_setup import configure_logging
+from utils.metrics import start_http_server
 
-def setup_logging():
+def setup_logging(json_format=False):
     logs_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
     os.makedirs(logs_dir, exist_ok=True)
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(os.path.join(logs_dir, 'weather_app.log')),
-            logging.StreamHandler()
-        ]
-    )
+    return configure_logging(os.path.join(logs_dir, 'weather_app.log'), json_format=json_format)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Weather Monitor")
+    parser.add_argument('--metrics-port', type=int, help="Serve Prometheus metrics on this local port")
+    parser.add_argument('--log-json', action='store_true', help="Write log records as JSON lines")
+    parser.add_argument('--gazetteer', help="City gazetteer for autocomplete (bundled TSV or a GeoNames cities dump)")
+    parser.add_argument('--data-dir', help="Directory for saved cities, snapshots and history "
+                                           "(a temporary directory when replaying)")
+    parser.add_argument('--record', metavar='ARCHIVE', help="Record upstream responses to this archive")
+    parser.add_argument('--replay', metavar='ARCHIVE', help="Serve responses from a recorded archive instead of Open-Meteo")
+    parser.add_argument('--replay-speed', type=float,
+                        help="Replay recorded latencies at this multiple of real time (default: as fast as possible)")
+    return parser.parse_known_args()
 
 def main():
-    setup_logging()
+    args, qt_args = parse_args()
+    setup_logging(json_format=args.log_json)
     logger = logging.getLogger(__name__)
     logger.info("Starting Weather Monitoring Application")
     
-    app = QApplication(sys.argv)
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+        logger.info(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+    
+    app = QApplication(sys.argv[:1] + qt_args)
     apply_stylesheet(app, theme='dark_teal.xml')
     app.setStyle("Fusion")
     
     try:
-        api = WeatherAPI()
-        data_manager = DataManager()
+        data_dir = args.data_dir
+        if args.replay and not data_dir:
+            # Replayed and synthetic weather must not overwrite the real snapshot or history
+            data_dir = tempfile.mkdtemp(prefix='weather-replay-')
+            logger.info(f"Replaying with data directory {data_dir}")
+        data_manager = DataManager(data_dir=data_dir)
+        session = create_session()
+        provider = create_provider(session, args.record, args.replay, args.replay_speed)
+        cache_size = cache_size_for(len(data_manager.load_cities()))
+        if args.replay:
+            api = WeatherAPI(geocoding_cache_file=None, rate_limits=None, geocoding_cache_size=cache_size,
+                             session=session, provider=provider)
+        else:
+            api = WeatherAPI(geocoding_cache_size=cache_size, session=session, provider=provider)
+        app.aboutToQuit.connect(api.close)
+        app.aboutToQuit.connect(data_manager.close)
         window = MainWindow()
         
         window.set_api(api)
         window.set_data_manager(data_manager)
+        window.set_gazetteer(Gazetteer(args.gazetteer))
+        window.set_alert_engine(AlertEngine(data_manager.load_alert_rules(), history_store=data_manager.history))
         
         window.show()
         
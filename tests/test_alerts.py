@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+import threading
+from alerts.engine import AlertEngine
+
+class RecordingHistory:
+    def __init__(self, rows):
+        self.rows = rows
+        self.threads = []
+
+    def query(self, city, start, end):
+        self.threads.append(threading.current_thread())
+        return [row for row in self.rows if start <= row['ts'] < end]
+
+def test_warmed_history_is_not_queried_again_on_update():
+    now = 10000.0
+    history = RecordingHistory([{'ts': now - 3000, 'temperature': 10.0, 'wind_speed': None},
+                                {'ts': now - 1800, 'temperature': 12.0, 'wind_speed': None}])
+    engine = AlertEngine(['temperature change 1h > 5'], history_store=history)
+
+    worker = threading.Thread(target=engine.warm, args=(['Berlin'], now))
+    worker.start()
+    worker.join()
+    raised, _ = engine.update('Berlin', {'temperature': 18.0}, now=now)
+
+    assert history.threads == [worker]
+    assert [alert.value for alert in raised] == [8.0]
+
+def test_unwarmed_city_still_loads_history_on_update():
+    now = 10000.0
+    history = RecordingHistory([{'ts': now - 1800, 'temperature': 12.0}])
+    engine = AlertEngine(['temperature change 1h > 5'], history_store=history)
+
+    engine.update('Berlin', {'temperature': 13.0}, now=now)
+    raised, _ = engine.update('Berlin', {'temperature': 18.0}, now=now + 60)
+
+    assert len(history.threads) == 1
+    assert [alert.value for alert in raised] == [6.0]
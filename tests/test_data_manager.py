@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+import json
+from data.data_manager import DataManager
+
+def reopen(manager, tmp_path):
+    manager.close()
+    return DataManager(data_dir=str(tmp_path))
+
+def test_city_coordinates_are_saved_with_the_city(tmp_path):
+    manager = DataManager(data_dir=str(tmp_path))
+    manager.add_city('London, Ontario, CA', (42.98, -81.23))
+    manager.add_city('Berlin')
+
+    manager = reopen(manager, tmp_path)
+    assert manager.load_cities() == ['London, Ontario, CA', 'Berlin']
+    assert manager.load_city_coordinates() == {'London, Ontario, CA': (42.98, -81.23)}
+
+    manager.remove_city('London, Ontario, CA')
+    manager = reopen(manager, tmp_path)
+    assert manager.load_city_coordinates() == {}
+    manager.close()
+    assert json.loads((tmp_path / 'cities.json').read_text()) == ['Berlin']
+
+def test_plain_city_list_still_loads(tmp_path):
+    (tmp_path / 'cities.json').write_text(json.dumps(['Paris', 'Oslo']))
+
+    manager = DataManager(data_dir=str(tmp_path))
+    assert manager.load_cities() == ['Paris', 'Oslo']
+    assert manager.load_city_coordinates() == {}
+    manager.close()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import api.rate_limiter
+import headless
+from alerts.engine import AlertEngine
+from api.providers import ProviderResponse
+from api.rate_limiter import TokenBucket
+from benchmarks.mock_server import forecast, geocode
+from data.data_manager import DataManager
+
+class MockProvider:
+    def __init__(self):
+        self.requests = {'geocoding': 0, 'forecast': 0}
+
+    def get(self, endpoint, url, params, timeout):
+        self.requests[endpoint] += 1
+        if endpoint == 'geocoding':
+            body = geocode(params['name'])
+        else:
+            body = forecast({name: [','.join(value) if isinstance(value, list) else str(value)]
+                             for name, value in params.items()})
+        return ProviderResponse(200, json.dumps(body).encode(), url)
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def data_manager(tmp_path):
+    manager = DataManager(data_dir=str(tmp_path))
+    yield manager
+    manager.close()
+
+def test_cycle_above_rate_budget_fetches_every_city(monkeypatch, tmp_path, data_manager):
+    monkeypatch.setattr(headless, 'DEFAULT_GEOCODING_CACHE_FILE', str(tmp_path / 'geocoding_cache.json'))
+    # Shrink the GUI's wait cap so a background wait would be rejected if the poller used it
+    monkeypatch.setattr(api.rate_limiter, 'DEFAULT_MAX_WAIT', {0: 0.05, 1: 0.05})
+    args = headless.parse_args(['--batch-size', '10', '--concurrency', '4', '--max-per-minute', '20',
+                                '--max-per-hour', '0', '--max-per-day', '0'])
+    weather_api = headless.create_api(args, None, MockProvider())
+    # Same budget as the command line asks for, refilled per second instead of per minute
+    weather_api.rate_limiter.buckets = [TokenBucket(20, 1)]
+
+    cities = [f"City {i}" for i in range(60)]
+    output = io.StringIO()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        fetched = headless.poll_once(weather_api, data_manager, AlertEngine(), cities, executor, output)
+    weather_api.close()
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert fetched == len(cities)
+    assert not [line for line in lines if 'error' in line]
+
+def test_geocoding_cache_holds_every_polled_city(monkeypatch, tmp_path):
+    monkeypatch.setattr(headless, 'DEFAULT_GEOCODING_CACHE_FILE', str(tmp_path / 'geocoding_cache.json'))
+    args = headless.parse_args(['--max-per-minute', '0', '--max-per-hour', '0', '--max-per-day', '0'])
+    cities = [f"City {i}" for i in range(6000)]
+    provider = MockProvider()
+    weather_api = headless.create_api(args, None, provider, len(cities))
+
+    for _ in range(2):
+        for city in cities:
+            weather_api.get_coordinates(city)
+    weather_api.close()
+
+    assert provider.requests['geocoding'] == len(cities)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import json
+import logging
+import pytest
+from utils.logging_setup import configure_logging
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+def log_failure(logger):
+    try:
+        {}['missing']
+    except KeyError:
+        logger.exception("Lookup failed for %s", 'Berlin')
+
+def test_json_log_keeps_the_exception(root_logger, tmp_path):
+    log_file = tmp_path / 'weather.log'
+    listener = configure_logging(str(log_file), json_format=True, console=False)
+    log_failure(logging.getLogger('tests'))
+    listener.stop()
+
+    entry = json.loads(log_file.read_text().splitlines()[0])
+    assert entry['message'] == "Lookup failed for Berlin"
+    assert entry['exception'].startswith('Traceback')
+    assert "KeyError: 'missing'" in entry['exception']
+
+def test_text_log_keeps_the_traceback(root_logger, tmp_path):
+    log_file = tmp_path / 'weather.log'
+    listener = configure_logging(str(log_file), console=False)
+    log_failure(logging.getLogger('tests'))
+    listener.stop()
+
+    text = log_file.read_text()
+    assert "Lookup failed for Berlin\nTraceback" in text
+    assert text.count('Traceback') == 1
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+import json
+from api.providers import ProviderResponse
+from api.weather_api import WeatherAPI
+from benchmarks.mock_server import forecast
+
+class BrokenFirstLocationProvider:
+    # Answers like the forecast API, then lets the test damage the first location of each response
+    def __init__(self, damage):
+        self.damage = damage
+
+    def get(self, endpoint, url, params, timeout):
+        body = forecast({name: [','.join(value) if isinstance(value, list) else str(value)]
+                         for name, value in params.items()})
+        self.damage((body if isinstance(body, list) else [body])[0])
+        return ProviderResponse(200, json.dumps(body).encode(), url)
+
+    def close(self):
+        pass
+
+def make_api(damage):
+    weather_api = WeatherAPI(geocoding_cache_file=None, rate_limits=None, provider=BrokenFirstLocationProvider(damage))
+    weather_api.seed_coordinates('Berlin', (52.52, 13.41))
+    weather_api.seed_coordinates('Paris', (48.85, 2.35))
+    return weather_api
+
+def null_temperature(location):
+    location['current']['temperature_2m'] = None
+
+def missing_current(location):
+    del location['current']
+
+def test_null_current_temperature_is_kept_as_missing():
+    weather_api = make_api(null_temperature)
+
+    weather = weather_api.get_weather('Berlin')
+    batch = weather_api.get_weather_many(['Berlin', 'Paris'])
+
+    assert weather['current']['temperature'] is None
+    assert weather['current']['humidity'] is not None
+    assert len(weather['forecast']) == 7
+    assert batch['Berlin']['current']['temperature'] is None
+    assert batch['Paris']['current']['temperature'] is not None
+
+def test_malformed_location_only_drops_its_own_city():
+    weather_api = make_api(missing_current)
+
+    assert list(weather_api.get_weather_many(['Berlin', 'Paris'])) == ['Paris']
+    assert weather_api.get_current_weather('Berlin') is None
+    assert weather_api.get_weather('Berlin') is None
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QComboBox,
+                            QListView, QStyledItemDelegate, QStyle, QMenu, QAbstractItemView)
+from PyQt5.QtCore import (Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel, QRectF,
+                          QSize, pyqtSignal)
+from PyQt5.QtGui import QColor, QFont, QPainter, QPainterPath
+
+CITY_ROLE = Qt.UserRole + 1
+WEATHER_ROLE = Qt.UserRole + 2
+FORECAST_ROLE = Qt.UserRole + 3
+STALE_ROLE = Qt.UserRole + 4
+TEMPERATURE_ROLE = Qt.UserRole + 5
+HUMIDITY_ROLE = Qt.UserRole + 6
+WIND_ROLE = Qt.UserRole + 7
+
+SORT_ROLES = [
+    ("Name", CITY_ROLE),
+    ("Temperature", TEMPERATURE_ROLE),
+    ("Humidity", HUMIDITY_ROLE),
+    ("Wind", WIND_ROLE),
+]
+
+def display_value(value):
+    return 'N/A' if value is None else value
+
+def _sort_value(value):
+    return value if isinstance(value, (int, float)) else float('-inf')
+
+ROLE_GETTERS = {
+    Qt.DisplayRole: lambda record: record['city'],
+    CITY_ROLE: lambda record: record['city'],
+    WEATHER_ROLE: lambda record: record['current'],
+    FORECAST_ROLE: lambda record: record['forecast'],
+    STALE_ROLE: lambda record: record['stale'],
+    TEMPERATURE_ROLE: lambda record: _sort_value(record['current'].get('temperature')),
+    HUMIDITY_ROLE: lambda record: _sort_value(record['current'].get('humidity')),
+    WIND_ROLE: lambda record: _sort_value(record['current'].get('wind_speed')),
+}
+
+class CityListModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cities = []
+        self._rows = {}
+        self._records = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._cities)
+
+    def data(self, index, role=Qt.DisplayRole):
+        getter = ROLE_GETTERS.get(role)
+        if getter is None or not index.isValid():
+            return None
+        return getter(self._records[self._cities[index.row()]])
+
+    def has_city(self, city):
+        return city in self._rows
+
+    def cities(self):
+        return list(self._cities)
+
+    def record(self, city):
+        return self._records.get(city)
+
+    def index_of(self, city):
+        row = self._rows.get(city)
+        return self.index(row) if row is not None else QModelIndex()
+
+    def add_city(self, city, current, forecast=None, stale=False):
+        if city in self._rows:
+            self.update_city(city, current, forecast, stale)
+            return
+
+        row = len(self._cities)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._cities.append(city)
+        self._rows[city] = row
+        self._records[city] = {'city': city, 'current': current, 'forecast': forecast, 'stale': stale}
+        self.endInsertRows()
+
+    def add_cities(self, entries):
+        entries = [entry for entry in entries if entry[0] not in self._rows]
+        if not entries:
+            return
+
+        first = len(self._cities)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        for row, (city, current, forecast, stale) in enumerate(entries, first):
+            self._cities.append(city)
+            self._rows[city] = row
+            self._records[city] = {'city': city, 'current': current, 'forecast': forecast, 'stale': stale}
+        self.endInsertRows()
+
+    def update_city(self, city, current, forecast=None, stale=False):
+        row = self._rows.get(city)
+        if row is None:
+            return
+
+        record = self._records[city]
+        record['current'] = current
+        if forecast:
+            record['forecast'] = forecast
+        record['stale'] = stale
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def remove_city(self, city):
+        row = self._rows.get(city)
+        if row is None:
+            return
+
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._cities[row]
+        del self._rows[city]
+        del self._records[city]
+        for i in range(row, len(self._cities)):
+            self._rows[self._cities[i]] = i
+        self.endRemoveRows()
+
+class CityFilterProxyModel(QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.setFilterRole(CITY_ROLE)
+        self.setSortRole(CITY_ROLE)
+        self.setSortCaseSensitivity(Qt.CaseInsensitive)
+        self.setDynamicSortFilter(True)
+
+class WeatherItemDelegate(QStyledItemDelegate):
+    ROW_HEIGHT = 76
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.city_font = QFont("Segoe UI", 13, QFont.Bold)
+        self.temp_font = QFont("Segoe UI", 22)
+        self.detail_font = QFont("Segoe UI", 10)
+        self.background = QColor(33, 37, 43, 242)
+        self.selected_background = QColor(189, 147, 249, 60)
+        self.text_color = QColor("#c3ccdf")
+        self.muted_color = QColor(255, 255, 255, 102)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        current = index.data(WEATHER_ROLE) or {}
+        rect = QRectF(option.rect).adjusted(4, 4, -4, -4)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        path = QPainterPath()
+        path.addRoundedRect(rect, 12, 12)
+        selected = option.state & QStyle.State_Selected
+        painter.fillPath(path, self.selected_background if selected else self.background)
+
+        text_rect = rect.adjusted(16, 8, -16, -8)
+        painter.setPen(self.text_color)
+        painter.setFont(self.city_font)
+        painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignTop, index.data(CITY_ROLE))
+
+        painter.setFont(self.detail_font)
+        details = (f"{current.get('description', 'N/A')}   "
+                   f"💧 {display_value(current.get('humidity'))}%   💨 {display_value(current.get('wind_speed'))} m/s")
+        painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignBottom, details)
+
+        painter.setFont(self.temp_font)
+        painter.drawText(text_rect, Qt.AlignRight | Qt.AlignVCenter, f"{display_value(current.get('temperature'))}°C")
+
+        if index.data(STALE_ROLE):
+            painter.setPen(self.muted_color)
+            painter.setFont(self.detail_font)
+            painter.drawText(text_rect.adjusted(0, 0, -110, 0), Qt.AlignRight | Qt.AlignTop, "⟳ cached")
+        painter.restore()
+
+class CityListView(QWidget):
+    removed = pyqtSignal(str)
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.proxy = CityFilterProxyModel(self)
+        self.proxy.setSourceModel(model)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(10)
+
+        toolbar = QHBoxLayout()
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter cities")
+        self.filter_input.textChanged.connect(self.proxy.setFilterFixedString)
+        toolbar.addWidget(self.filter_input)
+
+        self.sort_combo = QComboBox()
+        for label, _ in SORT_ROLES:
+            self.sort_combo.addItem(label)
+        self.sort_combo.currentIndexChanged.connect(self.apply_sort)
+        toolbar.addWidget(self.sort_combo)
+        layout.addLayout(toolbar)
+
+        self.list_view = QListView()
+        self.list_view.setModel(self.proxy)
+        self.list_view.setItemDelegate(WeatherItemDelegate(self.list_view))
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.list_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.list_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.list_view.customContextMenuRequested.connect(self.show_context_menu)
+        self.list_view.setStyleSheet("QListView { border: none; background-color: rgb(40, 44, 52); }")
+        layout.addWidget(self.list_view)
+
+        self.apply_sort()
+
+    def apply_sort(self):
+        _, role = SORT_ROLES[self.sort_combo.currentIndex()]
+        self.proxy.setSortRole(role)
+        self.proxy.sort(0, Qt.AscendingOrder if role == CITY_ROLE else Qt.DescendingOrder)
+
+    def is_city_visible(self, city):
+        if not self.isVisible():
+            return False
+        index = self.proxy.mapFromSource(self.model.index_of(city))
+        if not index.isValid():
+            return False
+        return self.list_view.viewport().rect().intersects(self.list_view.visualRect(index))
+
+    def selected_cities(self):
+        return [index.data(CITY_ROLE) for index in self.list_view.selectionModel().selectedIndexes()]
+
+    def show_context_menu(self, pos):
+        cities = self.selected_cities()
+        if not cities:
+            return
+
+        menu = QMenu(self)
+        remove_action = menu.addAction("Remove" if len(cities) == 1 else f"Remove {len(cities)} cities")
+        if menu.exec_(self.list_view.viewport().mapToGlobal(pos)) == remove_action:
+            for city in cities:
+                self.removed.emit(city)
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Delete:
+            for city in self.selected_cities():
+                self.removed.emit(city)
+            return
+        super().keyPressEvent(event)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+import time
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPlainTextEdit, QPushButton, QApplication
+from PyQt5.QtCore import Qt, QObject, QTimer
+from PyQt5.QtGui import QFont
+from utils.metrics import metrics
+
+class EventLoopLagMonitor(QObject):
+    def __init__(self, interval_ms=100, parent=None):
+        super().__init__(parent)
+        self.interval = interval_ms / 1000
+        self.last_tick = time.perf_counter()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        self.timer.start(interval_ms)
+
+    def tick(self):
+        now = time.perf_counter()
+        metrics.observe('gui_event_loop_lag_seconds', max(0.0, now - self.last_tick - self.interval))
+        self.last_tick = now
+
+class DiagnosticsPanel(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("Diagnostics")
+        self.resize(640, 480)
+        self.setStyleSheet("""
+            QWidget { background-color: rgb(33, 37, 43); color: #c3ccdf; }
+            QPlainTextEdit { border: none; background-color: rgb(40, 44, 52); }
+            QPushButton {
+                padding: 8px;
+                border: none;
+                border-radius: 8px;
+                background-color: rgba(189, 147, 249, 0.2);
+            }
+        """)
+
+        layout = QVBoxLayout(self)
+        header = QHBoxLayout()
+        title = QLabel("Diagnostics")
+        title.setFont(QFont("Segoe UI", 14, QFont.Bold))
+        header.addWidget(title)
+        header.addStretch()
+
+        copy_btn = QPushButton("Copy Prometheus Text")
+        copy_btn.clicked.connect(lambda: QApplication.clipboard().setText(metrics.render_prometheus()))
+        header.addWidget(copy_btn)
+        layout.addLayout(header)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Consolas", 10))
+        layout.addWidget(self.text)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start(2000)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        snapshot = metrics.snapshot()
+        hits = snapshot['counters'].get('geocoding_cache_lookups_total{result="hit"}', 0)
+        misses = snapshot['counters'].get('geocoding_cache_lookups_total{result="miss"}', 0)
+        lookups = hits + misses
+        lines = [f"Geocoding cache hit rate: {hits / lookups:.1%}" if lookups else "Geocoding cache hit rate: n/a", ""]
+        lines.append("Timings (count, p50 / p99 / max ms)")
+        for name, summary in snapshot['summaries'].items():
+            lines.append(f"  {name}: {summary['count']}, "
+                         f"{summary['p50'] * 1000:.1f} / {summary['p99'] * 1000:.1f} / {summary['max'] * 1000:.1f}")
+        lines.append("")
+        lines.append("Counters")
+        for name, value in snapshot['counters'].items():
+            lines.append(f"  {name}: {value:g}")
+        self.text.setPlainText('\n'.join(lines))
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+import logging
+import time
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from api.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, request_priority
+from utils.metrics import metrics
+
+class FetchTask(QRunnable):
+    def __init__(self, engine, generation, cities, priority=PRIORITY_BACKGROUND):
+        super().__init__()
+        self.engine = engine
+        self.generation = generation
+        self.cities = cities
+        self.priority = priority
+
+    def run(self):
+        if self.generation != self.engine.generation:
+            return
+
+        try:
+            with request_priority(self.priority):
+                results = self.engine.api.get_weather_many(self.cities)
+        except Exception as e:
+            self.engine.logger.error(f"Error in background fetch for {', '.join(self.cities)}: {str(e)}")
+            results = {}
+        if results and self.engine.alert_engine:
+            # History for change rules is read here so the GUI thread never waits on the store
+            self.engine.alert_engine.warm(results)
+        self.engine.chunk_done.emit(self.generation, self.cities, results)
+
+class HourlyTask(QRunnable):
+    def __init__(self, engine, city):
+        super().__init__()
+        self.engine = engine
+        self.city = city
+
+    def run(self):
+        try:
+            with request_priority(PRIORITY_INTERACTIVE):
+                hourly = self.engine.api.get_hourly_forecast(self.city)
+        except Exception as e:
+            self.engine.logger.error(f"Error in background hourly fetch for {self.city}: {str(e)}")
+            hourly = None
+        self.engine.hourly_result.emit(self.city, hourly)
+
+class FetchEngine(QObject):
+    result = pyqtSignal(str, object)
+    failed = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal()
+    cancelled = pyqtSignal()
+    hourly_result = pyqtSignal(str, object)
+    chunk_done = pyqtSignal(int, object, object)
+
+    def __init__(self, api, max_workers=4, parent=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+        self.api = api
+        self.alert_engine = None
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.generation = 0
+        self.total = 0
+        self.done = 0
+        self.cycle_started = None
+        self.chunk_done.connect(self._on_chunk_done)
+
+    def is_busy(self):
+        return self.done < self.total
+
+    def fetch(self, cities, priority=PRIORITY_BACKGROUND):
+        cities = list(cities)
+        if not cities:
+            return
+
+        if not self.is_busy():
+            self.cycle_started = time.perf_counter()
+        self.total += len(cities)
+        chunk_size = self.api.batch_size
+        for start in range(0, len(cities), chunk_size):
+            chunk = cities[start:start + chunk_size]
+            self.pool.start(FetchTask(self, self.generation, chunk, priority), self._pool_priority(priority))
+        self.progress.emit(self.done, self.total)
+
+    def fetch_hourly(self, city):
+        self.pool.start(HourlyTask(self, city), self._pool_priority(PRIORITY_INTERACTIVE))
+
+    @staticmethod
+    def _pool_priority(priority):
+        # QThreadPool runs higher numbers first; ours sort the other way round
+        return PRIORITY_BACKGROUND - priority
+
+    def cancel(self):
+        if not self.is_busy():
+            return
+
+        self.generation += 1
+        self.pool.clear()
+        self.total = 0
+        self.done = 0
+        self.cancelled.emit()
+
+    def shutdown(self, timeout_ms=3000):
+        self.cancel()
+        # Wakes workers parked in the rate limiter so the pool can drain
+        self.api.close()
+        self.pool.waitForDone(timeout_ms)
+
+    def _on_chunk_done(self, generation, cities, results):
+        if generation != self.generation:
+            return
+
+        with metrics.timer('gui_blocking_seconds', handler='fetch_results'):
+            for city in cities:
+                bundle = results.get(city)
+                if bundle:
+                    self.result.emit(city, bundle)
+                else:
+                    self.failed.emit(city)
+
+        self.done += len(cities)
+        self.progress.emit(self.done, self.total)
+        if self.done >= self.total:
+            metrics.observe('refresh_cycle_seconds', time.perf_counter() - self.cycle_started)
+            metrics.inc('refresh_cities_total', self.total)
+            self.total = 0
+            self.done = 0
+            self.finished.emit()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+from datetime import datetime, timezone, timedelta
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt5.QtCore import Qt, QPointF, QRectF
+from PyQt5.QtGui import QColor, QFont, QPainter, QPainterPath, QPen, QPixmap, QPolygonF
+from utils.decimation import lttb
+
+class HourlyChart(QWidget):
+    MARGIN_LEFT = 40
+    MARGIN_RIGHT = 8
+    MARGIN_TOP = 18
+    MARGIN_BOTTOM = 18
+
+    def __init__(self, title, unit, color, floor=None, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.unit = unit
+        self.color = QColor(color)
+        self.floor = floor
+        self.xs = []
+        self.ys = []
+        self.utc_offset = 0
+        self._pixmap = None
+        self.setMinimumHeight(110)
+
+    def set_series(self, xs, ys, utc_offset=0):
+        self.xs = xs
+        self.ys = ys
+        self.utc_offset = utc_offset
+        self._pixmap = None
+        self.update()
+
+    def resizeEvent(self, event):
+        self._pixmap = None
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if self._pixmap is None or self._pixmap.size() != self.size() * self.devicePixelRatioF():
+            self._pixmap = self._render()
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._pixmap)
+
+    def _render(self):
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(self.size() * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setFont(QFont("Segoe UI", 8))
+        painter.setPen(QColor("#c3ccdf"))
+        painter.drawText(QRectF(0, 0, self.width(), self.MARGIN_TOP), Qt.AlignLeft | Qt.AlignVCenter,
+                         f"{self.title} ({self.unit})")
+
+        plot = QRectF(self.MARGIN_LEFT, self.MARGIN_TOP,
+                      self.width() - self.MARGIN_LEFT - self.MARGIN_RIGHT,
+                      self.height() - self.MARGIN_TOP - self.MARGIN_BOTTOM)
+        xs, ys = lttb(self.xs, self.ys, max(3, int(plot.width())))
+        if len(xs) < 2 or plot.width() <= 0 or plot.height() <= 0:
+            painter.end()
+            return pixmap
+
+        x_min, x_max = xs[0], xs[-1]
+        y_min = min(ys) if self.floor is None else min(self.floor, min(ys))
+        y_max = max(ys)
+        if y_max == y_min:
+            y_max = y_min + 1
+
+        def to_point(x, y):
+            return QPointF(plot.left() + (x - x_min) / (x_max - x_min) * plot.width(),
+                           plot.bottom() - (y - y_min) / (y_max - y_min) * plot.height())
+
+        grid_pen = QPen(QColor(255, 255, 255, 25))
+        painter.setPen(grid_pen)
+        for fraction in (0, 0.5, 1):
+            y = plot.bottom() - fraction * plot.height()
+            painter.drawLine(QPointF(plot.left(), y), QPointF(plot.right(), y))
+            painter.setPen(QColor(255, 255, 255, 120))
+            painter.drawText(QRectF(0, y - 8, self.MARGIN_LEFT - 4, 16), Qt.AlignRight | Qt.AlignVCenter,
+                             f"{y_min + fraction * (y_max - y_min):.0f}")
+            painter.setPen(grid_pen)
+
+        tz = timezone(timedelta(seconds=self.utc_offset))
+        day = 86400
+        first_midnight = (int(x_min + self.utc_offset) // day + 1) * day - self.utc_offset
+        for midnight in range(first_midnight, int(x_max) + 1, day):
+            x = to_point(midnight, y_min).x()
+            painter.setPen(grid_pen)
+            painter.drawLine(QPointF(x, plot.top()), QPointF(x, plot.bottom()))
+            painter.setPen(QColor(255, 255, 255, 120))
+            label = datetime.fromtimestamp(midnight, tz).strftime("%a")
+            painter.drawText(QRectF(x + 2, plot.bottom(), 40, self.MARGIN_BOTTOM), Qt.AlignLeft | Qt.AlignVCenter, label)
+
+        line = QPolygonF([to_point(x, y) for x, y in zip(xs, ys)])
+        area = QPainterPath()
+        area.moveTo(QPointF(line[0].x(), plot.bottom()))
+        for point in line:
+            area.lineTo(point)
+        area.lineTo(QPointF(line[line.size() - 1].x(), plot.bottom()))
+        area.closeSubpath()
+        fill = QColor(self.color)
+        fill.setAlpha(50)
+        painter.fillPath(area, fill)
+        painter.setPen(QPen(self.color, 1.5))
+        painter.drawPolyline(line)
+        painter.end()
+        return pixmap
+
+class HourlyChartPanel(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        title = QLabel("Hourly Forecast")
+        title.setFont(QFont("Segoe UI", 12, QFont.Bold))
+        layout.addWidget(title)
+
+        self.temperature_chart = HourlyChart("Temperature", "°C", "#ff9e64")
+        self.precipitation_chart = HourlyChart("Precipitation", "mm", "#7aa2f7", floor=0)
+        self.wind_chart = HourlyChart("Wind", "m/s", "#9ece6a", floor=0)
+        for chart in (self.temperature_chart, self.precipitation_chart, self.wind_chart):
+            layout.addWidget(chart)
+
+    def set_forecast(self, hourly):
+        xs = hourly.time
+        self.temperature_chart.set_series(xs, hourly.temperature, hourly.utc_offset)
+        self.precipitation_chart.set_series(xs, hourly.precipitation, hourly.utc_offset)
+        self.wind_chart.set_series(xs, hourly.wind_speed, hourly.utc_offset)
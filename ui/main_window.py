@@ -1,10 +1,24 @@
 #!/usr/bin/env python3
 from datetime import datetime
+from functools import lru_cache
+import threading
+import time
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QHBoxLayout, QPushButton, QLabel, QLineEdit,
-                            QScrollArea, QFrame, QGridLayout)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+                            QScrollArea, QFrame, QGridLayout, QStackedWidget, QCompleter,
+                            QListWidget, QListWidgetItem)
+from PyQt5.QtCore import Qt, pyqtSignal, QStringListModel, QTimer
 from PyQt5.QtGui import QFont
+from api.rate_limiter import PRIORITY_INTERACTIVE
+from ui.city_list_view import CityListModel, CityListView, display_value
+from ui.diagnostics_panel import DiagnosticsPanel, EventLoopLagMonitor
+from ui.fetch_engine import FetchEngine
+from ui.hourly_chart import HourlyChartPanel
+from ui.refresh_scheduler import RefreshScheduler, PRIORITY_HIGH, PRIORITY_NORMAL
+
+@lru_cache(maxsize=64)
+def format_forecast_date(date):
+    return datetime.strptime(date, "%Y-%m-%d").strftime("%a, %b %d")
 
 class WindowButtons(QWidget):
     def __init__(self, parent=None):
@@ -54,6 +68,8 @@ class WindowButtons(QWidget):
 
 class WeatherCard(QFrame):
     removed = pyqtSignal(str)
+    hourly_requested = pyqtSignal(str)
+    HOURLY_TTL = 3600
     
     def __init__(self, city_name, weather_data, parent=None):
         super().__init__(parent)
@@ -105,6 +121,12 @@ class WeatherCard(QFrame):
         city_label.setFont(QFont("Segoe UI", 16, QFont.Bold))
         header_layout.addWidget(city_label)
         
+        self.stale_label = QLabel("⟳ cached")
+        self.stale_label.setStyleSheet("color: rgba(255, 255, 255, 0.4);")
+        self.stale_label.hide()
+        header_layout.addWidget(self.stale_label)
+        header_layout.addStretch()
+        
         expand_btn = QPushButton("▼")
         expand_btn.setObjectName("expandButton")
         expand_btn.setFixedSize(30, 30)
@@ -121,38 +143,40 @@ class WeatherCard(QFrame):
         weather_widget = QWidget()
         weather_layout = QHBoxLayout(weather_widget)
         
-        temp = self.weather_data.get('temperature', 'N/A')
-        temp_label = QLabel(f"{temp}°C")
-        temp_label.setFont(QFont("Segoe UI", 32))
-        weather_layout.addWidget(temp_label)
+        self.temp_label = QLabel()
+        self.temp_label.setFont(QFont("Segoe UI", 32))
+        weather_layout.addWidget(self.temp_label)
         
         details_widget = QWidget()
         details_layout = QVBoxLayout(details_widget)
         details_layout.setSpacing(5)
         
-        desc = self.weather_data.get('description', 'N/A')
-        desc_label = QLabel(desc)
-        desc_label.setFont(QFont("Segoe UI", 12))
-        details_layout.addWidget(desc_label)
+        self.desc_label = QLabel()
+        self.desc_label.setFont(QFont("Segoe UI", 12))
+        details_layout.addWidget(self.desc_label)
         
         metrics_widget = QWidget()
         metrics_layout = QHBoxLayout(metrics_widget)
         metrics_layout.setSpacing(20)
         
-        humidity = self.weather_data.get('humidity', 'N/A')
-        humidity_label = QLabel(f"💧 {humidity}%")
-        metrics_layout.addWidget(humidity_label)
+        self.humidity_label = QLabel()
+        metrics_layout.addWidget(self.humidity_label)
         
-        wind = self.weather_data.get('wind_speed', 'N/A')
-        wind_label = QLabel(f"💨 {wind} m/s")
-        metrics_layout.addWidget(wind_label)
+        self.wind_label = QLabel()
+        metrics_layout.addWidget(self.wind_label)
         
         details_layout.addWidget(metrics_widget)
         weather_layout.addWidget(details_widget)
         self.main_layout.addWidget(weather_widget)
+        self.update_weather(self.weather_data)
         
+        self.forecast_rows = []
+        self.forecast_dirty = False
+        self.hourly_panel = None
+        self.hourly_fetched_at = None
+    
+    def _build_forecast_widget(self):
         self.forecast_widget = QWidget()
-        self.forecast_widget.hide()
         forecast_layout = QVBoxLayout(self.forecast_widget)
         
         separator = QFrame()
@@ -164,48 +188,106 @@ class WeatherCard(QFrame):
         forecast_title.setFont(QFont("Segoe UI", 12, QFont.Bold))
         forecast_layout.addWidget(forecast_title)
         
-        self.forecast_data = None
         self.forecast_layout = QVBoxLayout()
         forecast_layout.addLayout(self.forecast_layout)
+        
+        self.hourly_panel = HourlyChartPanel()
+        forecast_layout.addWidget(self.hourly_panel)
         self.main_layout.addWidget(self.forecast_widget)
     
-    def update_forecast(self, forecast_data):
-        self.forecast_data = forecast_data
+    @staticmethod
+    def _set_text(label, text):
+        if label.text() != text:
+            label.setText(text)
+    
+    def update_weather(self, weather_data):
+        self.weather_data = weather_data
+        self._set_text(self.temp_label, f"{display_value(weather_data.get('temperature'))}°C")
+        self._set_text(self.desc_label, weather_data.get('description', 'N/A'))
+        self._set_text(self.humidity_label, f"💧 {display_value(weather_data.get('humidity'))}%")
+        self._set_text(self.wind_label, f"💨 {display_value(weather_data.get('wind_speed'))} m/s")
+    
+    def set_stale(self, stale):
+        self.stale_label.setVisible(stale)
+    
+    def _create_forecast_row(self):
+        day_widget = QWidget()
+        day_layout = QHBoxLayout(day_widget)
         
-        for i in reversed(range(self.forecast_layout.count())): 
-            widget = self.forecast_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
+        date_label = QLabel()
+        date_label.setMinimumWidth(100)
+        day_layout.addWidget(date_label)
         
-        for day in forecast_data:
-            day_widget = QWidget()
-            day_layout = QHBoxLayout(day_widget)
-            
-            date = datetime.strptime(day['date'], "%Y-%m-%d").strftime("%a, %b %d")
-            date_label = QLabel(date)
-            date_label.setMinimumWidth(100)
-            day_layout.addWidget(date_label)
-            
-            temp_label = QLabel(f"{day['temp_min']}°C - {day['temp_max']}°C")
-            temp_label.setMinimumWidth(100)
-            day_layout.addWidget(temp_label)
-            
-            desc_label = QLabel(day['description'])
-            desc_label.setMinimumWidth(150)
-            day_layout.addWidget(desc_label)
-            
-            prob_label = QLabel(f"🌧️ {day['precipitation_prob']}%")
-            day_layout.addWidget(prob_label)
-            
-            wind_label = QLabel(f"💨 {day['wind_speed']} m/s")
-            day_layout.addWidget(wind_label)
+        temp_label = QLabel()
+        temp_label.setMinimumWidth(100)
+        day_layout.addWidget(temp_label)
+        
+        desc_label = QLabel()
+        desc_label.setMinimumWidth(150)
+        day_layout.addWidget(desc_label)
+        
+        prob_label = QLabel()
+        day_layout.addWidget(prob_label)
+        
+        wind_label = QLabel()
+        day_layout.addWidget(wind_label)
+        
+        day_layout.addStretch()
+        self.forecast_layout.addWidget(day_widget)
+        return day_widget, (date_label, temp_label, desc_label, prob_label, wind_label)
+    
+    def update_forecast(self, forecast_data):
+        if forecast_data == self.forecast_data:
+            return
+        
+        self.forecast_data = forecast_data
+        self.forecast_dirty = True
+        if self.is_expanded:
+            self._render_forecast()
+    
+    def _render_forecast(self):
+        if self.forecast_widget is None:
+            self._build_forecast_widget()
+        
+        forecast_data = self.forecast_data or []
+        while len(self.forecast_rows) < len(forecast_data):
+            self.forecast_rows.append(self._create_forecast_row())
+        
+        for i, (day_widget, labels) in enumerate(self.forecast_rows):
+            if i >= len(forecast_data):
+                day_widget.hide()
+                continue
             
-            day_layout.addStretch()
-            self.forecast_layout.addWidget(day_widget)
+            day = forecast_data[i]
+            date_label, temp_label, desc_label, prob_label, wind_label = labels
+            self._set_text(date_label, format_forecast_date(day['date']))
+            self._set_text(temp_label, f"{display_value(day['temp_min'])}°C - {display_value(day['temp_max'])}°C")
+            self._set_text(desc_label, day['description'])
+            self._set_text(prob_label, f"🌧️ {display_value(day['precipitation_prob'])}%")
+            self._set_text(wind_label, f"💨 {display_value(day['wind_speed'])} m/s")
+            day_widget.show()
+        
+        self.forecast_dirty = False
+    
+    def set_hourly(self, hourly):
+        if hourly is None:
+            self.hourly_fetched_at = None
+            return
+        if self.hourly_panel is None:
+            self._build_forecast_widget()
+            self.forecast_widget.setVisible(self.is_expanded)
+        self.hourly_panel.set_forecast(hourly)
     
     def toggle_forecast(self):
         self.is_expanded = not self.is_expanded
-        self.forecast_widget.setVisible(self.is_expanded)
+        if self.is_expanded and (self.forecast_dirty or self.forecast_widget is None):
+            self._render_forecast()
+        if self.forecast_widget is not None:
+            self.forecast_widget.setVisible(self.is_expanded)
+        if self.is_expanded and (self.hourly_fetched_at is None
+                                 or time.time() - self.hourly_fetched_at > self.HOURLY_TTL):
+            self.hourly_fetched_at = time.time()
+            self.hourly_requested.emit(self.city_name)
         
         button = self.findChild(QPushButton, "expandButton")
         if button:
@@ -216,7 +298,17 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.api = None
         self.data_manager = None
+        self.fetch_engine = None
+        self.gazetteer = None
+        self.city_suggestions = {}
+        self.alert_engine = None
+        self.alert_items = {}
         self.weather_cards = {}
+        self.city_model = CityListModel(self)
+        # City name to the coordinates picked from autocomplete, or None for a typed name
+        self.pending_cities = {}
+        self.freshness_ttl = 600
+        self.list_view_threshold = 200
         self.dragging = False
         self.drag_position = None
         self.setup_ui()
@@ -295,17 +387,38 @@ class MainWindow(QMainWindow):
         self.city_input = QLineEdit()
         self.city_input.setPlaceholderText("Enter city name")
         self.city_input.returnPressed.connect(self.add_city)
+        self.city_input.textEdited.connect(self.update_suggestions)
+        self.suggestion_model = QStringListModel(self)
+        self.completer = QCompleter(self.suggestion_model, self)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.city_input.setCompleter(self.completer)
         sidebar_layout.addWidget(self.city_input)
         
         add_btn = QPushButton("Add City")
         add_btn.clicked.connect(self.add_city)
         sidebar_layout.addWidget(add_btn)
         
+        self.view_toggle_btn = QPushButton("Compact List View")
+        self.view_toggle_btn.setCheckable(True)
+        self.view_toggle_btn.toggled.connect(self.set_list_view)
+        sidebar_layout.addWidget(self.view_toggle_btn)
+        
+        diagnostics_btn = QPushButton("Diagnostics")
+        diagnostics_btn.clicked.connect(self.show_diagnostics)
+        sidebar_layout.addWidget(diagnostics_btn)
+        
         self.status_label = QLabel()
         self.status_label.setStyleSheet("color: #ff6b6b;")
         self.status_label.setWordWrap(True)
         sidebar_layout.addWidget(self.status_label)
         
+        self.alerts_list = QListWidget()
+        self.alerts_list.setWordWrap(True)
+        self.alerts_list.setMaximumHeight(200)
+        self.alerts_list.setStyleSheet("background-color: transparent; border: none; color: #ffb86c;")
+        self.alerts_list.hide()
+        sidebar_layout.addWidget(self.alerts_list)
+        
         sidebar_layout.addStretch()
         
         self.update_time_label = QLabel("Last updated: Never")
@@ -351,13 +464,23 @@ class MainWindow(QMainWindow):
         self.cards_layout.addStretch()
         
         scroll.setWidget(scroll_content)
-        content_layout.addWidget(scroll)
+        
+        self.city_list_view = CityListView(self.city_model)
+        self.city_list_view.setStyleSheet("background-color: rgb(40, 44, 52);")
+        self.city_list_view.removed.connect(self.remove_city)
+        
+        self.content_stack = QStackedWidget()
+        self.content_stack.addWidget(scroll)
+        self.content_stack.addWidget(self.city_list_view)
+        content_layout.addWidget(self.content_stack)
         
         main_layout.addLayout(content_layout)
         
-        self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self.update_weather)
-        self.update_timer.start(600000)
+        self.scheduler = RefreshScheduler(interval=600, priority_fn=self.refresh_priority, parent=self)
+        self.scheduler.due.connect(self.refresh_cities)
+        
+        self.lag_monitor = EventLoopLagMonitor(parent=self)
+        self.diagnostics_panel = None
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -379,63 +502,226 @@ class MainWindow(QMainWindow):
     
     def set_api(self, api):
         self.api = api
+        self.fetch_engine = FetchEngine(api, parent=self)
+        self.fetch_engine.alert_engine = self.alert_engine
+        self.fetch_engine.result.connect(self.on_weather_result)
+        self.fetch_engine.failed.connect(self.on_weather_failed)
+        self.fetch_engine.progress.connect(self.on_fetch_progress)
+        self.fetch_engine.finished.connect(self.on_fetch_finished)
+        self.fetch_engine.cancelled.connect(self.on_fetch_cancelled)
+        self.fetch_engine.hourly_result.connect(self.on_hourly_result)
     
     def set_data_manager(self, data_manager):
         self.data_manager = data_manager
-        for city in self.data_manager.load_cities():
-            self.add_city(city)
+        snapshot = self.data_manager.load_weather_data()
+        cities = self.data_manager.load_cities()
+        for city_name, coordinates in self.data_manager.load_city_coordinates().items():
+            self.api.seed_coordinates(city_name, coordinates)
+        if len(cities) > self.list_view_threshold:
+            self.view_toggle_btn.setChecked(True)
+        
+        now = time.time()
+        entries = []
+        stale_cities = []
+        for city_name in cities:
+            if self.city_model.has_city(city_name):
+                continue
+            
+            entry = snapshot.get(city_name) or {}
+            age = now - entry.get('fetched_at', 0)
+            is_stale = age > self.freshness_ttl
+            entries.append((city_name, entry.get('current') or {}, entry.get('forecast'), is_stale))
+            self.scheduler.add_city(city_name, self.scheduler.interval if is_stale else self.freshness_ttl - age)
+            if is_stale:
+                stale_cities.append(city_name)
+        
+        self.city_model.add_cities(entries)
+        if not self.view_toggle_btn.isChecked():
+            for city_name, weather_data, forecast_data, is_stale in entries:
+                self._create_card(city_name, weather_data, forecast_data, is_stale)
+        self.fetch_engine.fetch(stale_cities)
+    
+    def set_gazetteer(self, gazetteer):
+        self.gazetteer = gazetteer
+        threading.Thread(target=gazetteer.load, daemon=True).start()
+    
+    def set_alert_engine(self, alert_engine):
+        self.alert_engine = alert_engine
+        if self.fetch_engine:
+            self.fetch_engine.alert_engine = alert_engine
+    
+    def _evaluate_alerts(self, city_name, weather_data, forecast_data):
+        if self.alert_engine:
+            self._apply_alerts(*self.alert_engine.update(city_name, weather_data, forecast_data))
+    
+    def _apply_alerts(self, raised, cleared):
+        for alert in cleared:
+            item = self.alert_items.pop((alert.rule.id, alert.city), None)
+            if item:
+                self.alerts_list.takeItem(self.alerts_list.row(item))
+        for alert in raised:
+            item = QListWidgetItem(f"⚠ {alert.message}")
+            self.alert_items[(alert.rule.id, alert.city)] = item
+            self.alerts_list.insertItem(0, item)
+        if raised:
+            self.status_label.setText(f"⚠ {raised[-1].message}")
+        self.alerts_list.setVisible(bool(self.alert_items))
+    
+    def update_suggestions(self, text):
+        if not self.gazetteer or not self.gazetteer.loaded:
+            return
+        places = self.gazetteer.suggest(text)
+        self.city_suggestions = {place.label: place for place in places}
+        self.suggestion_model.setStringList(list(self.city_suggestions))
+        if places:
+            self.completer.complete()
     
     def add_city(self, city_name=None):
         if not city_name:
             city_name = self.city_input.text().strip()
             if not city_name:
                 return
-            self.city_input.clear()
+            # The completer writes the chosen suggestion back after returnPressed, so clear afterwards
+            QTimer.singleShot(0, self.city_input.clear)
         
-        if city_name in self.weather_cards:
-            self.status_label.setText(f"City '{city_name}' is already added!")
-            return
+        # Suggestions keep their full label so places sharing a name (London, GB and London, CA) stay apart
+        place = self.city_suggestions.get(city_name)
         
-        weather_data = self.api.get_current_weather(city_name)
-        if not weather_data:
-            self.status_label.setText(f"Could not find weather data for '{city_name}'")
+        if self.city_model.has_city(city_name) or city_name in self.pending_cities:
+            self.status_label.setText(f"City '{city_name}' is already added!")
             return
         
-        forecast_data = self.api.get_forecast(city_name)
+        coordinates = (place.latitude, place.longitude) if place else None
+        if coordinates:
+            self.api.seed_coordinates(city_name, coordinates)
         self.status_label.setText("")
-        
+        self.pending_cities[city_name] = coordinates
+        self.fetch_engine.fetch([city_name], priority=PRIORITY_INTERACTIVE)
+    
+    def _add_city_entry(self, city_name, weather_data, forecast_data, refresh_in=None, stale=False):
+        self.city_model.add_city(city_name, weather_data, forecast_data, stale)
+        if not self.view_toggle_btn.isChecked():
+            self._create_card(city_name, weather_data, forecast_data, stale)
+        self.scheduler.add_city(city_name, refresh_in)
+    
+    def _create_card(self, city_name, weather_data, forecast_data, stale=False):
         card = WeatherCard(city_name, weather_data)
         if forecast_data:
             card.update_forecast(forecast_data)
+        if stale:
+            card.set_stale(True)
         card.removed.connect(self.remove_city)
+        card.hourly_requested.connect(self.fetch_hourly)
         self.weather_cards[city_name] = card
         self.cards_layout.insertWidget(self.cards_layout.count() - 1, card)
+        return card
+    
+    def set_list_view(self, enabled):
+        if enabled:
+            for card in self.weather_cards.values():
+                self.cards_layout.removeWidget(card)
+                card.deleteLater()
+            self.weather_cards.clear()
+            self.content_stack.setCurrentWidget(self.city_list_view)
+        else:
+            for city_name in self.city_model.cities():
+                record = self.city_model.record(city_name)
+                self._create_card(city_name, record['current'], record['forecast'], record['stale'])
+            self.content_stack.setCurrentIndex(0)
+    
+    def fetch_hourly(self, city_name):
+        if self.fetch_engine:
+            self.fetch_engine.fetch_hourly(city_name)
+    
+    def on_hourly_result(self, city_name, hourly):
+        card = self.weather_cards.get(city_name)
+        if card:
+            card.set_hourly(hourly)
+    
+    def on_weather_result(self, city_name, bundle):
+        weather_data = bundle['current']
+        forecast_data = bundle['forecast']
+        self.data_manager.update_weather_data(city_name, bundle)
+        
+        if city_name in self.pending_cities:
+            coordinates = self.pending_cities.pop(city_name)
+            self._add_city_entry(city_name, weather_data, forecast_data, refresh_in=self.scheduler.interval)
+            self.data_manager.add_city(city_name, coordinates)
+            self._evaluate_alerts(city_name, weather_data, forecast_data)
+            return
         
-        self.data_manager.add_city(city_name)
+        if not self.city_model.has_city(city_name):
+            return
+        
+        self.scheduler.report_success(city_name)
+        self.city_model.update_city(city_name, weather_data, forecast_data)
+        card = self.weather_cards.get(city_name)
+        if card:
+            card.update_weather(weather_data)
+            if forecast_data:
+                card.update_forecast(forecast_data)
+            card.set_stale(False)
+        self._evaluate_alerts(city_name, weather_data, forecast_data)
+    
+    def on_weather_failed(self, city_name):
+        if city_name in self.pending_cities:
+            if self.pending_cities.pop(city_name):
+                self.api.forget_coordinates(city_name)
+            self.status_label.setText(f"Could not find weather data for '{city_name}'")
+        else:
+            self.scheduler.report_failure(city_name)
+    
+    def on_fetch_progress(self, done, total):
+        self.update_time_label.setText(f"Updating... {done}/{total}")
+    
+    def on_fetch_finished(self):
         self.update_time_label.setText(f"Last updated: {datetime.now().strftime('%H:%M:%S')}")
     
+    def on_fetch_cancelled(self):
+        for city_name, coordinates in self.pending_cities.items():
+            if coordinates:
+                self.api.forget_coordinates(city_name)
+        self.pending_cities.clear()
+        self.update_time_label.setText("Update cancelled")
+    
     def remove_city(self, city_name):
-        if city_name in self.weather_cards:
-            card = self.weather_cards.pop(city_name)
+        if not self.city_model.has_city(city_name):
+            return
+        
+        card = self.weather_cards.pop(city_name, None)
+        if card:
             self.cards_layout.removeWidget(card)
             card.deleteLater()
-            self.data_manager.remove_city(city_name)
+        self.city_model.remove_city(city_name)
+        self.scheduler.remove_city(city_name)
+        self.data_manager.remove_city(city_name)
+        self.api.forget_coordinates(city_name)
+        if self.alert_engine:
+            self._apply_alerts([], self.alert_engine.remove_city(city_name))
+    
+    def refresh_priority(self, city_name):
+        card = self.weather_cards.get(city_name)
+        if card and (card.is_expanded or not card.visibleRegion().isEmpty()):
+            return PRIORITY_HIGH
+        if not card and self.city_list_view.is_city_visible(city_name):
+            return PRIORITY_HIGH
+        return PRIORITY_NORMAL
+    
+    def refresh_cities(self, cities):
+        self.fetch_engine.fetch([city for city in cities if self.city_model.has_city(city)])
     
     def update_weather(self):
-        for city_name in list(self.weather_cards.keys()):
-            weather_data = self.api.get_current_weather(city_name)
-            forecast_data = self.api.get_forecast(city_name)
-            
-            if weather_data:
-                old_card = self.weather_cards.pop(city_name)
-                self.cards_layout.removeWidget(old_card)
-                old_card.deleteLater()
-                
-                card = WeatherCard(city_name, weather_data)
-                if forecast_data:
-                    card.update_forecast(forecast_data)
-                card.removed.connect(self.remove_city)
-                self.weather_cards[city_name] = card
-                self.cards_layout.insertWidget(self.cards_layout.count() - 1, card)
-        
-        self.update_time_label.setText(f"Last updated: {datetime.now().strftime('%H:%M:%S')}")
+        if self.fetch_engine.is_busy():
+            return
+        self.fetch_engine.fetch(self.city_model.cities())
+    
+    def show_diagnostics(self):
+        if self.diagnostics_panel is None:
+            self.diagnostics_panel = DiagnosticsPanel(self)
+        self.diagnostics_panel.show()
+        self.diagnostics_panel.raise_()
+    
+    def closeEvent(self, event):
+        if self.fetch_engine:
+            self.fetch_engine.shutdown()
+        super().closeEvent(event)
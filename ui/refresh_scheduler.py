@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import heapq
+import itertools
+import random
+import time
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+class RefreshScheduler(QObject):
+    due = pyqtSignal(list)
+
+    def __init__(self, interval=600, jitter=0.1, retry_delay=60, max_backoff=3600, max_per_tick=50,
+                 tick_ms=5000, priority_fn=None, parent=None):
+        super().__init__(parent)
+        self.interval = interval
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+        self.max_backoff = max_backoff
+        self.max_per_tick = max_per_tick
+        self.priority_fn = priority_fn
+        self.failures = {}
+        self.next_due = {}
+        self._heap = []
+        self._counter = itertools.count()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        self.timer.start(tick_ms)
+
+    def add_city(self, city, delay=None):
+        if delay is None:
+            delay = random.uniform(0, self.interval)
+        self.failures.pop(city, None)
+        self._schedule(city, time.time() + delay)
+
+    def remove_city(self, city):
+        self.next_due.pop(city, None)
+        self.failures.pop(city, None)
+
+    def report_success(self, city):
+        if city not in self.next_due:
+            return
+        self.failures.pop(city, None)
+        self._schedule(city, time.time() + self._jittered(self.interval))
+
+    def report_failure(self, city):
+        if city not in self.next_due:
+            return
+        failures = self.failures.get(city, 0) + 1
+        self.failures[city] = failures
+        delay = min(self.retry_delay * 2 ** (failures - 1), self.max_backoff)
+        self._schedule(city, time.time() + self._jittered(delay))
+
+    def tick(self):
+        now = time.time()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, _, city = heapq.heappop(self._heap)
+            if self.next_due.get(city) == when:
+                due.append(city)
+        if not due:
+            return
+
+        if self.priority_fn:
+            due.sort(key=self.priority_fn)
+        batch, deferred = due[:self.max_per_tick], due[self.max_per_tick:]
+        for city in deferred:
+            self._schedule(city, now)
+        for city in batch:
+            self._schedule(city, now + self._jittered(self.interval))
+        self.due.emit(batch)
+
+    def _jittered(self, delay):
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _schedule(self, city, when):
+        self.next_due[city] = when
+        heapq.heappush(self._heap, (when, next(self._counter), city))
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+import math
+from typing import List, Sequence, Tuple
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> Tuple[List[float], List[float]]:
+    points = [(x, y) for x, y in zip(xs, ys) if not math.isnan(y)]
+    if threshold >= len(points) or threshold < 3:
+        return [x for x, _ in points], [y for _, y in points]
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        bucket_start = int(i * bucket_size) + 1
+        bucket_end = int((i + 1) * bucket_size) + 1
+        next_start = bucket_end
+        next_end = min(int((i + 2) * bucket_size) + 1, len(points))
+
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(x for x, _ in next_bucket) / len(next_bucket)
+        avg_y = sum(y for _, y in next_bucket) / len(next_bucket)
+
+        ax, ay = points[a]
+        best_area = -1.0
+        best = bucket_start
+        for j in range(bucket_start, bucket_end):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return [x for x, _ in sampled], [y for _, y in sampled]
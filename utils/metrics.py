@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+class Summary:
+    def __init__(self, reservoir_size: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=reservoir_size)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def quantile(self, fraction: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._summaries: Dict[Tuple[str, Tuple], Summary] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict) -> Tuple[str, Tuple]:
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = Summary()
+            summary.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = {self._format_name(name, labels): value for (name, labels), value in self._counters.items()}
+            summaries = {
+                self._format_name(name, labels): {
+                    'count': summary.count,
+                    'sum': summary.total,
+                    'max': summary.max,
+                    **{f"p{int(q * 100)}": summary.quantile(q) for q in QUANTILES}
+                }
+                for (name, labels), summary in self._summaries.items()
+            }
+        return {'counters': dict(sorted(counters.items())), 'summaries': dict(sorted(summaries.items()))}
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                lines.append(f"{self._format_name(name, labels)} {value:g}")
+            for (name, labels), summary in sorted(self._summaries.items()):
+                for q in QUANTILES:
+                    lines.append(f"{self._format_name(name, labels + (('quantile', str(q)),))} {summary.quantile(q):.6f}")
+                lines.append(f"{self._format_name(name + '_sum', labels)} {summary.total:.6f}")
+                lines.append(f"{self._format_name(name + '_count', labels)} {summary.count}")
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _format_name(name: str, labels: Tuple) -> str:
+        if not labels:
+            return name
+        rendered = ','.join(f'{key}="{value}"' for key, value in labels)
+        return f"{name}{{{rendered}}}"
+
+metrics = Metrics()
+
+def start_http_server(port: int, host: str = '127.0.0.1', registry: Optional[Metrics] = None) -> ThreadingHTTPServer:
+    registry = registry or metrics
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server